@@ -2,25 +2,29 @@ import re
 
 from tariochbctools.importers.general import mt940importer
 
-
-def strip_newline(string):
-    return string.replace("\n", "").replace("\r", "")
+PAYEE_RE = re.compile(r"ORDP/([^/]+)")
+BENEFICIARY_RE = re.compile(r"/BENM/([^/]+)")
+REMITTANCE_RE = re.compile(r"/REMI/([^/]+)")
 
 
 class BCGEImporter(mt940importer.Importer):
+    extra_details_rules = mt940importer.RewriteRules([(r"[\n\r]", "")])
+    transaction_details_rules = mt940importer.RewriteRules([(r"[\n\r]", "")])
+
     def prepare_payee(self, trxdata):
-        transaction_details = strip_newline(trxdata["transaction_details"])
-        payee = re.search(r"ORDP/([^/]+)", transaction_details)
+        transaction_details = self.transaction_details_rules(
+            trxdata["transaction_details"]
+        )
+        payee = PAYEE_RE.search(transaction_details)
         if payee is None:
             return ""
         else:
             return payee.group(1)
 
     def prepare_narration(self, trxdata):
-        transaction_details = strip_newline(trxdata["transaction_details"])
-        extra_details = strip_newline(trxdata["extra_details"])
-        beneficiary = re.search(r"/BENM/([^/]+)", transaction_details)
-        remittance = re.search(r"/REMI/([^/]+)", transaction_details)
+        extra_details, transaction_details = self.rewrite_details(trxdata)
+        beneficiary = BENEFICIARY_RE.search(transaction_details)
+        remittance = REMITTANCE_RE.search(transaction_details)
         narration = []
         if beneficiary is not None:
             narration.append("Beneficiary: %s" % beneficiary.group(1))
@@ -9,8 +9,12 @@ from beancount.ingest import importer
 from dateutil.parser import parse
 from dateutil.relativedelta import relativedelta
 
+from tariochbctools.importers.general.dedupIndex import dedup_index
 from tariochbctools.importers.general.priceLookup import PriceLookup
 
+# Largest page of user transactions returned by Bitstamp
+PAGE_SIZE = 1000
+
 
 class Importer(importer.ImporterProtocol):
     """An importer for Bitstamp."""
@@ -22,6 +26,7 @@ class Importer(importer.ImporterProtocol):
         return ""
 
     def extract(self, file, existing_entries):
+        self.rates = {}
         self.priceLookup = PriceLookup(existing_entries, "CHF")
 
         config = yaml.safe_load(file.contents())
@@ -35,22 +40,54 @@ class Importer(importer.ImporterProtocol):
         self.capGainAccount = config["capGainAccount"]
 
         dateCutoff = date.today() + relativedelta(months=-config["monthCutoff"])
+        lastRef = self.lastRef(existing_entries)
 
-        trxs = self.client.user_transactions()
+        trxs = list(self.fetchTransactions(dateCutoff, lastRef))
         trxs.reverse()
+        self.rates = self.priceLookup.fetchPriceAmounts(
+            filter(None, map(self.rateLookup, trxs))
+        )
         result = []
         for trx in trxs:
             entry = self.fetchSingle(trx)
             if entry.date > dateCutoff:
                 result.append(entry)
 
+        dedup_index(existing_entries).mark_all(result, "ref", self.account)
         return result
 
-    def fetchSingle(self, trx):
-        id = int(trx["id"])
-        type = int(trx["type"])
-        date = parse(trx["datetime"]).date()
-
+    def lastRef(self, existing_entries):
+        """The highest transaction id already imported into the account."""
+        refs = [
+            int(entry.meta["ref"])
+            for entry in existing_entries or []
+            if isinstance(entry, data.Transaction)
+            and str(entry.meta.get("ref", "")).isdigit()
+            and any(
+                posting.account.startswith(self.account + ":")
+                for posting in entry.postings
+            )
+        ]
+        return max(refs, default=None)
+
+    def fetchTransactions(self, dateCutoff, lastRef=None):
+        """The user transactions newer than the cutoff and the last imported
+        one, newest first, page by page."""
+        offset = 0
+        while True:
+            page = self.client.user_transactions(offset=offset, limit=PAGE_SIZE)
+            for trx in page:
+                if (lastRef is not None and int(trx["id"]) <= lastRef) or parse(
+                    trx["datetime"]
+                ).date() <= dateCutoff:
+                    return
+                yield trx
+
+            if len(page) < PAGE_SIZE:
+                return
+            offset += len(page)
+
+    def amounts(self, trx):
         posAmt = 0
         posCcy = None
         negAmt = 0
@@ -65,11 +102,36 @@ class Importer(importer.ImporterProtocol):
                     negAmt = amt
                     negCcy = ccy.upper()
 
+        return posAmt, posCcy, negAmt, negCcy
+
+    def rateLookup(self, trx):
+        """The (currency, date) whose fiat rate the transaction needs."""
+        type = int(trx["type"])
+        date = parse(trx["datetime"]).date()
+        posAmt, posCcy, negAmt, negCcy = self.amounts(trx)
+        if type == 0:
+            return posCcy, date
+        if type == 2:
+            if posCcy.lower() + "_" + negCcy.lower() in trx:
+                return negCcy, date
+            return posCcy, date
+        return None
+
+    def fetchRate(self, ccy, date):
+        if (ccy, date) in self.rates:
+            return self.rates[(ccy, date)]
+        return self.priceLookup.fetchPriceAmount(ccy, date)
+
+    def fetchSingle(self, trx):
+        id = int(trx["id"])
+        type = int(trx["type"])
+        date = parse(trx["datetime"]).date()
+
+        posAmt, posCcy, negAmt, negCcy = self.amounts(trx)
+
         if type == 0:
             narration = "Deposit"
-            cost = data.Cost(
-                self.priceLookup.fetchPriceAmount(posCcy, date), "CHF", None, None
-            )
+            cost = data.Cost(self.fetchRate(posCcy, date), "CHF", None, None)
             postings = [
                 data.Posting(
                     self.account + ":" + posCcy,
@@ -101,7 +163,7 @@ class Importer(importer.ImporterProtocol):
                 feeCcy = posCcy
                 posAmt -= fee
 
-            rateFiatCcy = self.priceLookup.fetchPriceAmount(feeCcy, date)
+            rateFiatCcy = self.fetchRate(feeCcy, date)
             if feeCcy == posCcy:
                 posCcyCost = None
                 posCcyPrice = amount.Amount(rateFiatCcy, "CHF")
@@ -1,3 +1,7 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from os import path
 
 import blockcypher
@@ -5,13 +9,48 @@ import yaml
 from beancount.core import amount, data
 from beancount.core.number import D
 from beancount.ingest import importer
+from blockcypher.api import RateLimitError
 
 from tariochbctools.importers.general.priceLookup import PriceLookup
+from tariochbctools.importers.general.stateStore import JsonStateStore
+
+# Addresses whose transactions are fetched at the same time, one without api_key
+MAX_WORKERS = 4
+
+# Transactions per page, raised up to MAX_TXN_LIMIT for blocks not fitting a page
+TXN_LIMIT = 50
+MAX_TXN_LIMIT = 2000
+
+# Requests answered with 429 which are retried, waiting RATE_LIMIT_WAIT seconds
+# doubled on every retry
+MAX_RETRIES = 3
+RATE_LIMIT_WAIT = 1
+
+# Confirmations after which a transaction is kept in the local cache
+MIN_CONFIRMATIONS = 6
+
+
+def _dump_txref(trx):
+    return {
+        "tx_hash": trx["tx_hash"],
+        "block_height": trx["block_height"],
+        "confirmed": trx["confirmed"].isoformat(),
+        "value": trx["value"],
+    }
+
+
+def _load_txref(trx):
+    return dict(trx, confirmed=datetime.fromisoformat(trx["confirmed"]))
 
 
 class Importer(importer.ImporterProtocol):
     """An importer for Blockchain data."""
 
+    def __init__(self):
+        self.state = JsonStateStore("blockchain")
+        self.cache = {}
+        self.apiKey = None
+
     def identify(self, file):
         return path.basename(file.name).endswith("blockchain.yaml")
 
@@ -21,16 +60,32 @@ class Importer(importer.ImporterProtocol):
     def extract(self, file, existing_entries):
         config = yaml.safe_load(file.contents())
         self.config = config
+        self.apiKey = config.get("api_key")
         baseCcy = config["base_ccy"]
         priceLookup = PriceLookup(existing_entries, baseCcy)
 
+        # addresses are fetched concurrently, in their original order
+        addresses = self.config["addresses"]
+        self.cache = self.state.load()
+        # without a token the rate limit is only a few requests per second
+        max_workers = config.get("max_workers", MAX_WORKERS) if self.apiKey else 1
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                results = list(
+                    pool.map(
+                        lambda address: self.fetchTxrefs(
+                            address["address"], address["currency"]
+                        ),
+                        addresses,
+                    )
+                )
+        finally:
+            self.state.update(self.cache)
+
         entries = []
-        for address in self.config["addresses"]:
+        for address, txrefs in zip(addresses, results):
             currency = address["currency"]
-            addressDetails = blockcypher.get_address_details(
-                address["address"], coin_symbol=currency.lower()
-            )
-            for trx in addressDetails["txrefs"]:
+            for trx in txrefs:
                 metakv = {
                     "ref": trx["tx_hash"],
                 }
@@ -65,3 +120,70 @@ class Importer(importer.ImporterProtocol):
                 entries.append(entry)
 
         return entries
+
+    def getAddressDetails(self, address, currency, **params):
+        """The address details, retried if the rate limit is exceeded."""
+        wait = RATE_LIMIT_WAIT
+        for _ in range(MAX_RETRIES):
+            try:
+                return blockcypher.get_address_details(
+                    address, coin_symbol=currency.lower(), api_key=self.apiKey, **params
+                )
+            except RateLimitError:
+                time.sleep(wait)
+                wait *= 2
+        return blockcypher.get_address_details(
+            address, coin_symbol=currency.lower(), api_key=self.apiKey, **params
+        )
+
+    def fetchTxrefs(self, address, currency):
+        """The confirmed txrefs of an address, newest first.
+
+        Only the blocks after the cached txrefs are requested, page by page.
+        """
+        key = currency.lower() + ":" + address
+        cached = self.cache.get(key, [])
+        after = max((trx["block_height"] for trx in cached), default=None)
+
+        txrefs = []
+        before = None
+        limit = TXN_LIMIT
+        while True:
+            details = self.getAddressDetails(
+                address,
+                currency,
+                txn_limit=limit,
+                before_bh=before,
+                after_bh=after,
+            )
+            page = details.get("txrefs", [])
+            if not details.get("hasMore") or not page:
+                txrefs.extend(page)
+                break
+
+            # the lowest block may continue on the next page, request it again
+            lowest = min(trx["block_height"] for trx in page)
+            complete = [trx for trx in page if trx["block_height"] > lowest]
+            if complete:
+                txrefs.extend(complete)
+                before = lowest + 1
+            elif limit < MAX_TXN_LIMIT:
+                # the page is a single block, request it with a larger page
+                limit = min(limit * 2, MAX_TXN_LIMIT)
+            else:
+                logging.warning(
+                    "Block %s of %s has more than %s transactions, some are missing",
+                    lowest,
+                    address,
+                    MAX_TXN_LIMIT,
+                )
+                txrefs.extend(page)
+                before = lowest
+
+        self.cache[key] = [
+            _dump_txref(trx)
+            for trx in txrefs
+            if trx["confirmations"] >= MIN_CONFIRMATIONS
+        ] + cached
+
+        return txrefs + [_load_txref(trx) for trx in cached]
@@ -1,4 +1,3 @@
-import csv
 import datetime
 import subprocess
 from io import StringIO
@@ -9,18 +8,32 @@ from beancount.core import amount, data, position
 from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
-from dateutil.parser import parse
 from enum import Enum
 from typing import List, Dict
 
+from tariochbctools.importers.general import csvColumns
+from tariochbctools.importers.general.watermark import Watermark, watermark_key
+
+SCHEMA = {
+    'date': csvColumns.DATE,
+    'account': csvColumns.TEXT,
+    'category': csvColumns.TEXT,
+    'payee': csvColumns.TEXT,
+    'amount': csvColumns.DECIMAL,
+    'currency': csvColumns.TEXT,
+    'note': csvColumns.TEXT,
+    'labels': csvColumns.TEXT,
+}
+
 
 class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
     """An importer for BudgetBakers CSV files."""
 
-    def __init__(self, regexps, account_map, category_map):
+    def __init__(self, regexps, account_map, category_map, incremental=False):
         identifier.IdentifyMixin.__init__(self, matchers=[("filename", regexps)])
         self.account_map = account_map
         self.category_map = category_map
+        self.incremental = incremental
 
     def name(self):
         return super().name()
@@ -31,29 +44,40 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
     def extract(self, file, existing_entries=None):
         entries = []
 
-        with StringIO(file.contents()) as csvfile:
-            reader = csv.DictReader(
-                csvfile,
-                delimiter=";",
-                skipinitialspace=False,
-            )
-            rows = list(reader)
+        # New records are added at the top of the export
+        if self.incremental:
+            watermark = Watermark(watermark_key(self.name(), '', file.name), newest_first=True)
+            content = watermark.read(file.name)
+        else:
+            watermark = None
+            content = file.contents()
 
-        for index, row in enumerate(reversed(rows)):
+        with StringIO(content) as csvfile:
+            try:
+                columns = csvColumns.read_columns(csvfile, SCHEMA, delimiter=";")
+            except ValueError as e:
+                raise Warning('Error parsing file {}\n{}'.format(file.name, e))
+
+        rows = zip(
+            columns['date'],
+            columns['account'],
+            columns['category'],
+            columns['payee'],
+            columns['amount'],
+            columns['currency'],
+            columns['note'],
+            columns['labels'],
+        )
+        for index, row in enumerate(reversed(list(rows))):
             try:
                 # Parse transaction
+                book_date, debit_account, category, payee, amt, currency, note, label = row
                 meta = data.new_metadata(file.name, index)
-                book_date = parse(row['date'].strip()).date()
-                debit_account = row['account'].strip()
                 if debit_account not in self.account_map:
                     raise Warning('Account {} missing in map'.format(debit_account))
                 debit_account = self.account_map[debit_account]
-                type = row['type'].strip()
-                category = row['category'].strip()
-                payee = row['payee'].strip()
-                cash_flow = amount.Amount(D(row['amount']), row['currency'].strip())
-                note = row['note'].strip()
-                label = row['labels'].strip().replace(" ", "")
+                cash_flow = amount.Amount(amt, currency)
+                label = label.replace(" ", "")
                 label = {label} if label else data.EMPTY_SET
                 postings = [data.Posting(debit_account, cash_flow, None, None, None, None)]
 
@@ -89,6 +113,8 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
                 raise Warning('Error parsing line {}\n{}'.format(row,e))
                 continue
 
+        if watermark:
+            watermark.stage(max(columns['date'], default=None))
         return entries
 
 
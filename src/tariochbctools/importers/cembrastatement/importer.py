@@ -1,6 +1,5 @@
 import re
 from datetime import datetime, timedelta
-from dateutil.parser import parse
 from pathlib import Path
 import csv
 
@@ -10,6 +9,10 @@ from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
 
+from tariochbctools.importers.general.dateParser import DateParser
+from tariochbctools.importers.general.pdfBatch import PdfBatchMixin
+from tariochbctools.importers.general.pdfTables import postprocess_table
+
 
 def cleanDecimal(formatted_number):
     return D(formatted_number.replace("'", ""))
@@ -25,47 +28,35 @@ def parse_pdf_to_csv(pdf_file_name, csv_file_name):
     balance_amount = None
 
     for table in tables:
-        df = table.df
-
         # skip incompatible tables
-        if df.columns.size != 5:
+        if table.df.columns.size != 5:
             continue
 
-        for index, row in df.iterrows():
-
-            trx_date, book_date, text, credit, debit = tuple(row)
-            trx_date, book_date, text, credit, debit = (
-                trx_date.strip(),
-                book_date.strip(),
-                text.strip(),
-                credit.strip(),
-                debit.strip(),
+        rows, other_rows = postprocess_table(
+            table.df,
+            ["trx_date", "book_date", "text", "credit", "debit"],
+            date="book_date",
+            amounts=["credit", "debit"],
+            text="text",
+            date_formats=["%d.%m.%Y"],
+        )
+
+        # Transaction entries
+        for book_date, text, credit, debit in zip(
+            rows["book_date"], rows["text"], rows["credit"], rows["debit"]
+        ):
+            value = - debit if debit else credit
+            transactions.append([book_date, value, text])
+
+        # Balance entry
+        for text, credit, debit in zip(other_rows["text"], other_rows["credit"], other_rows["debit"]):
+            match = re.search(
+                r"Saldo per (\d\d\.\d\d\.\d\d\d\d) zu unseren Gunsten CHF", text
             )
-
-            # Transaction entry
-            try:
-                book_date = datetime.strptime(book_date, "%d.%m.%Y").date()
-            except Exception:
-                book_date = None
-
-            if book_date:
-                value = - cleanDecimal(debit) if debit else cleanDecimal(credit)
-                if amount:
-                    transactions.append([book_date, value, text])
-                continue
-
-            # Balance entry
-            try:
-                balance_date = re.search(
-                    r"Saldo per (\d\d\.\d\d\.\d\d\d\d) zu unseren Gunsten CHF", text
-                ).group(1)
-                balance_date = datetime.strptime(balance_date, "%d.%m.%Y").date()
+            if match:
+                balance_date = datetime.strptime(match.group(1), "%d.%m.%Y").date()
                 # add 1 day: cembra provides balance at EOD, but beancount checks it at SOD
                 balance_date = balance_date + timedelta(days=1)
-            except Exception:
-                pass
-
-            if balance_date:
                 balance_amount = cleanDecimal(debit) if debit else - cleanDecimal(credit)
 
     # Write to CSV file
@@ -82,9 +73,11 @@ def parse_pdf_to_csv(pdf_file_name, csv_file_name):
             f.write('{};{};{}\n'.format(*transaction))
 
 
-class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
+class Importer(PdfBatchMixin, identifier.IdentifyMixin, importer.ImporterProtocol):
     """An importer for Cembra Card Statement PDF files."""
 
+    pdf_to_csv = staticmethod(parse_pdf_to_csv)
+
     def __init__(self, regexps, account):
         identifier.IdentifyMixin.__init__(self, matchers=[("filename", regexps)])
         self.account = account
@@ -110,9 +103,10 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
             rows = list(reader)
 
         # Balance
+        parse_date = DateParser()
         entries.append(data.Balance(
             data.new_metadata(file.name, 0),
-            parse(rows[1][0].strip(), dayfirst=False).date(),
+            parse_date(rows[1][0]),
             self.account,
             amount.Amount(-D(rows[1][1]), self.currency),
             None,
@@ -121,7 +115,7 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
 
         # Transactions
         for row in rows[2:]:
-            date = parse(row[0].strip(), dayfirst=False).date()
+            date = parse_date(row[0])
             cash_flow = D(row[1])
             desc = row[2]
             meta = data.new_metadata(file.name, 0)
@@ -1,6 +1,5 @@
 import re
 from datetime import datetime, timedelta
-from dateutil.parser import parse
 from pathlib import Path
 import csv
 # import matplotlib
@@ -12,11 +11,27 @@ from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
 
+from tariochbctools.importers.general.dateParser import DateParser
+from tariochbctools.importers.general.pdfBatch import PdfBatchMixin
+from tariochbctools.importers.general.pdfTables import postprocess_table
+
 
 def cleanDecimal(formatted_number):
     return D(formatted_number.replace("'", ""))
 
 
+BALANCE_RE = re.compile(r"Saldo per (\d\d\.\d\d\.\d\d\d\d) zu unseren Gunsten CHF")
+
+
+def read_body_tables(pdf_file_name, n_pages, trailing_pages):
+    return camelot.read_pdf(
+        pdf_file_name,
+        pages='2-{}'.format(n_pages - trailing_pages),
+        flavor="stream",
+        table_areas=["50,700,560,90"]
+    )
+
+
 def parse_pdf_to_csv(pdf_file_name, csv_file_name):
     transactions = []
 
@@ -24,15 +39,11 @@ def parse_pdf_to_csv(pdf_file_name, csv_file_name):
     reader = PdfReader(pdf_file_name)
     n_pages = len(reader.pages)
 
-    # Read tables
+    # Read tables, the trailing pages without transactions depend on the statement
     try:
-        tables = camelot.read_pdf(
-            pdf_file_name, pages='2-{}'.format(n_pages-2), flavor="stream", table_areas=["50,700,560,90"]
-        )
+        tables = read_body_tables(pdf_file_name, n_pages, 2)
     except ValueError:
-        tables = camelot.read_pdf(
-            pdf_file_name, pages='2-{}'.format(n_pages-3), flavor="stream", table_areas=["50,700,560,90"]
-        )
+        tables = read_body_tables(pdf_file_name, n_pages, 3)
 
     # Visual debugging
     # camelot.plot(tables[0], kind='text').show()
@@ -42,53 +53,46 @@ def parse_pdf_to_csv(pdf_file_name, csv_file_name):
     balance_amount = None
 
     for table in tables:
-        for index, row in table.df.iterrows():
-            if len(tuple(row)) == 5:
-                _, book_date, text, credit, debit = tuple(row)
-            elif len(tuple(row)) == 4:
-                book_date, text, credit, debit = tuple(row)
-            else:
-                # Balance in a separate table
-                text, value = tuple(row)
-                balance_date = re.search(
-                    r"Saldo per (\d\d\.\d\d\.\d\d\d\d) zu unseren Gunsten CHF", text
-                ).group(1)
-                balance_date = datetime.strptime(balance_date, "%d.%m.%Y").date()
-                # add 1 day: cembra provides balance at EOD, but beancount checks it at SOD
-                balance_date = balance_date + timedelta(days=1)
-                balance_amount = cleanDecimal(value)
-                continue
-
-            book_date, text, credit, debit = (
-                book_date.strip(),
-                text.strip(),
-                credit.strip(),
-                debit.strip(),
-            )
+        df = table.df
+
+        if df.columns.size == 2:
+            # Balance in a separate table
+            for text, value in zip(df[0], df[1]):
+                match = BALANCE_RE.search(text)
+                if match:
+                    balance_date = datetime.strptime(match.group(1), "%d.%m.%Y").date()
+                    # add 1 day: cembra provides balance at EOD, but beancount checks it at SOD
+                    balance_date = balance_date + timedelta(days=1)
+                    balance_amount = cleanDecimal(value.strip())
+            continue
+
+        if df.columns.size == 5:
+            df = df.iloc[:, 1:]
+
+        rows, other_rows = postprocess_table(
+            df,
+            ["book_date", "text", "credit", "debit"],
+            date="book_date",
+            amounts=["credit", "debit"],
+            text="text",
+            date_formats=["%d.%m.%Y"],
+        )
 
-            # Transaction entry
-            try:
-                book_date = datetime.strptime(book_date, "%d.%m.%Y").date()
-            except Exception:
-                book_date = None
-
-            if book_date:
-                value = - cleanDecimal(debit) if debit else cleanDecimal(credit)
-                transactions.append([book_date, value, text])
-                continue
-
-            # Balance entry
-            try:
-                balance_date = re.search(
-                    r"Saldo per (\d\d\.\d\d\.\d\d\d\d) zu unseren Gunsten CHF", text
-                ).group(1)
-                balance_date = datetime.strptime(balance_date, "%d.%m.%Y").date()
+        # Transaction entries
+        for book_date, text, credit, debit in zip(
+            rows["book_date"], rows["text"], rows["credit"], rows["debit"]
+        ):
+            value = - debit if debit else credit
+            transactions.append([book_date, value, text])
+
+        # Balance entry
+        for text, credit, debit in zip(other_rows["text"], other_rows["credit"], other_rows["debit"]):
+            match = BALANCE_RE.search(text)
+            if match:
+                balance_date = datetime.strptime(match.group(1), "%d.%m.%Y").date()
                 # add 1 day: cembra provides balance at EOD, but beancount checks it at SOD
                 balance_date = balance_date + timedelta(days=1)
                 balance_amount = cleanDecimal(debit) if debit else - cleanDecimal(credit)
-            except Exception:
-                pass
-
 
     # Write to CSV file
     with open(csv_file_name, 'wt') as f:
@@ -104,9 +108,11 @@ def parse_pdf_to_csv(pdf_file_name, csv_file_name):
             f.write('{};{};{}\n'.format(*transaction))
 
 
-class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
+class Importer(PdfBatchMixin, identifier.IdentifyMixin, importer.ImporterProtocol):
     """An importer for Cembra Certo One Statement PDF files."""
 
+    pdf_to_csv = staticmethod(parse_pdf_to_csv)
+
     def __init__(self, regexps, account):
         identifier.IdentifyMixin.__init__(self, matchers=[("filename", regexps)])
         self.account = account
@@ -132,9 +138,10 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
             rows = list(reader)
 
         # Balance
+        parse_date = DateParser()
         entries.append(data.Balance(
             data.new_metadata(file.name, 0),
-            parse(rows[1][0].strip(), dayfirst=False).date(),
+            parse_date(rows[1][0]),
             self.account,
             amount.Amount(-D(rows[1][1]), self.currency),
             None,
@@ -143,7 +150,7 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
 
         # Transactions
         for row in rows[2:]:
-            date = parse(row[0].strip(), dayfirst=False).date()
+            date = parse_date(row[0])
             cash_flow = D(row[1])
             desc = row[2]
             meta = data.new_metadata(file.name, 0)
@@ -9,7 +9,8 @@ from beancount.core import amount, data, position
 from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
-from dateutil.parser import parse
+
+from tariochbctools.importers.general.dateParser import DateParser
 
 
 def build_sell_postings(
@@ -173,9 +174,10 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
             )
             rows = list(reader)[1:]
 
+        parse_date = DateParser()
         for index, row in enumerate(reversed(rows)):
             # Parse
-            book_date = parse(row["date"].strip()).date()
+            book_date = parse_date(row["date"])
             meta = data.new_metadata(file.name, index)
             cashFlow = amount.Amount(D(row["cashFlow"]), "CHF")
             category = row["category"].strip()
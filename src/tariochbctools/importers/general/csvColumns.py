@@ -0,0 +1,233 @@
+import csv
+import logging
+import warnings
+from datetime import datetime
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, TextIO
+
+from beancount.core.number import D
+
+from tariochbctools.importers.general.dateParser import DateParser
+
+try:
+    import pandas as pd
+except ImportError:  # pragma: no cover
+    pd = None
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:  # pragma: no cover
+    pa = None
+
+
+class Column(NamedTuple):
+    """Declares how the cells of a CSV column are converted.
+
+    ``kind`` is one of ``text``, ``decimal`` or ``date``. Dates are parsed with
+    ``format`` if given, otherwise with a format inferred by ``DateParser``.
+    Empty cells of an ``optional`` column become ``None``, otherwise empty
+    decimals are zero (like ``D("")``) and empty dates are an error.
+    """
+
+    kind: str
+    format: Optional[str] = None
+    optional: bool = False
+
+
+TEXT = Column("text")
+DECIMAL = Column("decimal")
+OPTIONAL_DECIMAL = Column("decimal", optional=True)
+DATE = Column("date")
+OPTIONAL_DATE = Column("date", optional=True)
+
+
+def date_column(format: str) -> Column:
+    return Column("date", format)
+
+
+def _read_with_pyarrow(
+    csvfile: TextIO,
+    fieldnames: Optional[Sequence[str]],
+    delimiter: str,
+) -> Dict[str, List[str]]:
+    text = csvfile.read()
+    header = next(csv.reader([text.partition("\n")[0]], delimiter=delimiter))
+    names = list(fieldnames) if fieldnames else header
+    if not names:
+        return {}
+
+    # all columns are read as strings, pyarrow would otherwise infer the types
+    table = pa_csv.read_csv(
+        pa.py_buffer(text.encode("utf-8")),
+        read_options=pa_csv.ReadOptions(column_names=names, skip_rows=1),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in names},
+            strings_can_be_null=False,
+        ),
+    )
+    return {name: table.column(name).to_pylist() for name in names}
+
+
+def _read_with_pandas(
+    csvfile: TextIO,
+    fieldnames: Optional[Sequence[str]],
+    delimiter: str,
+    skipinitialspace: bool,
+) -> Dict[str, List[str]]:
+    with warnings.catch_warnings():
+        # surplus cells, e.g. of a trailing delimiter, are dropped like csv does
+        warnings.simplefilter("ignore", pd.errors.ParserWarning)
+        df = pd.read_csv(
+            csvfile,
+            sep=delimiter,
+            header=None if fieldnames else 0,
+            names=fieldnames,
+            skiprows=1 if fieldnames else None,
+            index_col=False,
+            dtype=str,
+            na_filter=False,
+            skipinitialspace=skipinitialspace,
+        )
+    return {name: df[name].tolist() for name in df.columns}
+
+
+def _read_with_csv(
+    csvfile: TextIO,
+    fieldnames: Optional[Sequence[str]],
+    delimiter: str,
+    skipinitialspace: bool,
+) -> Dict[str, List[str]]:
+    reader = csv.reader(csvfile, delimiter=delimiter, skipinitialspace=skipinitialspace)
+    header = next(reader, [])
+    names = list(fieldnames) if fieldnames else header
+    columns = [[] for _ in names]
+    for row in reader:
+        if not row:
+            continue
+        for index, cells in enumerate(columns):
+            cells.append(row[index] if index < len(row) else "")
+    return dict(zip(names, columns))
+
+
+def read_raw(
+    csvfile: TextIO,
+    fieldnames: Optional[Sequence[str]] = None,
+    delimiter: str = ",",
+    skipinitialspace: bool = False,
+) -> Dict[str, List[str]]:
+    """Read all cells of a CSV file as strings, one list per column.
+
+    The first line is the header. If ``fieldnames`` are given they name the
+    columns instead and the header is skipped. Missing cells are empty
+    strings, cells beyond the last column are ignored. pyarrow or pandas are
+    used when installed, files they reject, e.g. with ragged rows, are read
+    with the csv module.
+    """
+    start = csvfile.tell()
+    if pa is not None and not skipinitialspace:
+        try:
+            return _read_with_pyarrow(csvfile, fieldnames, delimiter)
+        except pa.ArrowInvalid:
+            csvfile.seek(start)
+
+    if pd is not None:
+        try:
+            return _read_with_pandas(csvfile, fieldnames, delimiter, skipinitialspace)
+        except pd.errors.EmptyDataError:
+            return {name: [] for name in fieldnames or []}
+        except pd.errors.ParserError:
+            csvfile.seek(start)
+
+    return _read_with_csv(csvfile, fieldnames, delimiter, skipinitialspace)
+
+
+def _parse_decimals(values: Sequence[str], column: Column) -> Dict[str, object]:
+    return {value: D(value) for value in values}
+
+
+def _parse_dates(values: Sequence[str], column: Column) -> Dict[str, object]:
+    if column.format is None:
+        parser = DateParser()
+        return {value: parser(value) for value in values}
+
+    if pd is None:
+        return {
+            value: datetime.strptime(value, column.format).date() for value in values
+        }
+
+    values = list(values)
+    dates = pd.to_datetime(pd.Series(values, dtype=str), format=column.format)
+    return dict(zip(values, dates.dt.date))
+
+
+_PARSERS = {"decimal": _parse_decimals, "date": _parse_dates}
+
+
+def _convert(
+    name: str, cells: List[str], column: Column, first_line: int, errors: str
+) -> list:
+    cells = [cell.strip() for cell in cells]
+    if column.kind == "text":
+        return cells
+
+    parser = _PARSERS[column.kind]
+    # distinct values, in order for the date format inference
+    values = dict.fromkeys(cells)
+    values.pop("", None)
+    try:
+        converted = parser(values, column)
+    except (ValueError, OverflowError):
+        # parse one by one to find the offending cells
+        converted = {}
+        for value in values:
+            try:
+                converted.update(parser([value], column))
+            except (ValueError, OverflowError):
+                pass
+
+    if column.optional:
+        converted[""] = None
+    elif column.kind == "decimal":
+        converted[""] = D("")
+
+    result = []
+    for index, cell in enumerate(cells):
+        if cell in converted:
+            result.append(converted[cell])
+            continue
+
+        message = "line {}: invalid {} {!r} in column {}".format(
+            first_line + index, column.kind, cell, name
+        )
+        if errors == "raise":
+            raise ValueError(message)
+        logging.warning(message)
+        result.append(None)
+
+    return result
+
+
+def read_columns(
+    csvfile: TextIO,
+    schema: Mapping[str, Column],
+    fieldnames: Optional[Sequence[str]] = None,
+    delimiter: str = ",",
+    skipinitialspace: bool = False,
+    errors: str = "raise",
+) -> Dict[str, list]:
+    """Read the columns of a CSV file declared in ``schema``, converted in bulk.
+
+    Every distinct cell value is converted only once. Invalid cells raise a
+    ``ValueError`` naming the line, or with ``errors="coerce"`` are logged
+    and become ``None``. See ``read_raw`` for the other arguments.
+    """
+    raw = read_raw(csvfile, fieldnames, delimiter, skipinitialspace)
+    missing = [name for name in schema if name not in raw]
+    if missing:
+        raise ValueError("missing columns: {}".format(", ".join(missing)))
+
+    return {
+        name: _convert(name, raw[name], column, 2, errors)
+        for name, column in schema.items()
+    }
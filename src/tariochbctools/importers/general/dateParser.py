@@ -0,0 +1,97 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence
+
+from dateutil.parser import parse
+
+# Formats tried when inferring, the day/month order is only taken if dateutil agrees
+FORMATS = (
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%d %H:%M:%S%z",
+    "%Y%m%d",
+    "%d.%m.%Y",
+    "%d.%m.%y",
+    "%d.%m.%Y %H:%M",
+    "%d.%m.%Y %H:%M:%S",
+    "%m.%d.%Y",
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+    "%d/%m/%y",
+    "%m/%d/%y",
+    "%d-%m-%Y",
+    "%m-%d-%Y",
+    "%Y/%m/%d",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%b %d, %Y",
+)
+
+
+def _strptime(value: str, format: str) -> date:
+    return datetime.strptime(value, format).date()
+
+
+class DateParser:
+    """Parses the dates of one column, like ``dateutil.parser.parse(...).date()``.
+
+    While the first ``sample_size`` distinct values are parsed with dateutil,
+    the candidate formats giving the same dates are narrowed down. The first
+    one left is then used with ``strptime`` for all following values, which
+    only go through dateutil again if they do not match it. Every distinct
+    string is parsed only once.
+
+    Use one instance per column of a file, the format is fixed once inferred.
+    """
+
+    def __init__(
+        self,
+        dayfirst: bool = False,
+        formats: Sequence[str] = FORMATS,
+        sample_size: int = 3,
+    ):
+        self.dayfirst = dayfirst
+        self.format: Optional[str] = None
+        self._candidates: List[str] = list(formats)
+        self._samples = sample_size
+        self._cache: Dict[str, date] = {}
+
+    def __call__(self, value: str) -> date:
+        value = value.strip()
+        parsed = self._cache.get(value)
+        if parsed is None:
+            parsed = self._parse(value)
+            self._cache[value] = parsed
+        return parsed
+
+    def _parse(self, value: str) -> date:
+        if self.format is not None:
+            try:
+                return _strptime(value, self.format)
+            except ValueError:
+                pass
+
+        parsed = parse(value, dayfirst=self.dayfirst).date()
+        if self._samples > 0:
+            self._learn(value, parsed)
+        return parsed
+
+    def _learn(self, value: str, parsed: date):
+        candidates = []
+        for format in self._candidates:
+            try:
+                if _strptime(value, format) == parsed:
+                    candidates.append(format)
+            except ValueError:
+                pass
+
+        self._candidates = candidates
+        self._samples -= 1
+        if not candidates:
+            self._samples = 0
+        elif self._samples == 0:
+            self.format = candidates[0]
@@ -0,0 +1,106 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from beancount.core import data
+from beancount.ingest import similar
+
+# Entries with this metadata are commented out by bean-extract
+DUPLICATE_META = "__duplicate__"
+
+# Metadata keys holding the references of the importers
+REFERENCE_KEYS = (
+    "nordref",
+    "zakref",
+    "zkb_reference",
+    "trans_id",
+    "quickfile_id",
+    "orderno",
+    "transaction_id",
+    "ref",
+)
+
+
+def _accounts(entry) -> Iterable[str]:
+    if isinstance(entry, data.Transaction):
+        return (posting.account for posting in entry.postings)
+    account = getattr(entry, "account", None)
+    return (account,) if account else ()
+
+
+class DedupIndex:
+    """Existing entries indexed by their reference metadata.
+
+    Replaces the fuzzy comparison of every new entry against every existing
+    one by a lookup of the reference the importer attached.
+    """
+
+    def __init__(
+        self, entries: Optional[Iterable], keys: Sequence[str] = REFERENCE_KEYS
+    ):
+        self.index: Dict[Tuple[str, str], List] = defaultdict(list)
+        for entry in entries or ():
+            meta = entry.meta
+            if not meta:
+                continue
+            for key in keys:
+                value = meta.get(key)
+                if value is not None:
+                    self.index[(key, str(value))].append(entry)
+
+    def find(self, key: str, value, account: Optional[str] = None):
+        """Return an existing entry with the reference, if ``account`` is given
+        one with a posting to it or one of its sub-accounts."""
+        for entry in self.index.get((key, str(value)), ()):
+            if account is None or any(
+                name == account or name.startswith(account + ":")
+                for name in _accounts(entry)
+            ):
+                return entry
+        return None
+
+    def mark(self, entry, key: str, account: Optional[str] = None) -> bool:
+        """Mark ``entry`` as duplicate if its reference is already known."""
+        value = entry.meta.get(key)
+        if value is None or self.find(key, value, account) is None:
+            return False
+        entry.meta[DUPLICATE_META] = True
+        return True
+
+    def mark_all(self, entries: Iterable, key: str, account: Optional[str] = None):
+        for entry in entries:
+            self.mark(entry, key, account)
+
+
+def dedup_index(existing_entries: Optional[list]) -> DedupIndex:
+    """Return the index of ``existing_entries``.
+
+    The index is built for a single extract call and not kept, so the ledger
+    is not held in memory once the import run is done.
+    """
+    return DedupIndex(existing_entries)
+
+
+def find_duplicate_entries(new_entries_list, existing_entries):
+    """Hook for ``bean-extract`` replacing its default duplicate detection.
+
+    Entries already marked through their reference are passed through, only
+    the remaining ones are compared against the ledger by beancount.
+    """
+    mod_entries_list = []
+    for key, new_entries in new_entries_list:
+        unmarked = [
+            entry
+            for entry in new_entries
+            if not (entry.meta and entry.meta.get(DUPLICATE_META))
+        ]
+        duplicates = {
+            id(entry)
+            for entry, _ in similar.find_similar_entries(unmarked, existing_entries)
+        }
+        mod_entries = []
+        for entry in new_entries:
+            if id(entry) in duplicates:
+                entry = entry._replace(meta=dict(entry.meta, **{DUPLICATE_META: True}))
+            mod_entries.append(entry)
+        mod_entries_list.append((key, mod_entries))
+    return mod_entries_list
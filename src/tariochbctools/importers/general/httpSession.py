@@ -0,0 +1,48 @@
+import threading
+from typing import Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Transient failures retried with an exponential backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+
+
+def create_session(
+    retries: int = 3,
+    backoff_factor: float = 0.5,
+    pool_maxsize: int = 10,
+    status_forcelist: Sequence[int] = RETRY_STATUSES,
+) -> requests.Session:
+    """Create a session keeping connections alive, with retries.
+
+    Only idempotent requests are retried, ``Retry-After`` headers are honoured.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        max_retries=retry, pool_connections=pool_maxsize, pool_maxsize=pool_maxsize
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Session shared by the importers of a process."""
+    global _session
+
+    with _lock:
+        if _session is None:
+            _session = create_session()
+        return _session
@@ -1,13 +1,119 @@
+import re
+from datetime import timedelta
+from typing import BinaryIO, Iterable, Iterator, List, Tuple, Union
+
 import mt940
 from beancount.core import amount, data
 from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
 
+TAG_RE = re.compile(r"^:(?P<tag>[0-9]{2}[A-Z]?|NS):")
+
+# Tags closing the transaction part of a statement
+CLOSING_TAGS = ("62", "64", "65")
+
+
+def decode_lines(stream: BinaryIO) -> Iterator[str]:
+    for line in stream:
+        try:
+            yield line.decode("utf-8")
+        except UnicodeDecodeError:
+            yield line.decode("iso8859-15")
+
+
+def _parse(lines: List[str]) -> mt940.models.Transactions:
+    transactions = mt940.models.Transactions()
+    transactions.parse("".join(lines))
+    return transactions
+
+
+def iter_records(
+    lines: Iterable[str],
+) -> Iterator[Union[mt940.models.Transaction, mt940.models.Balance]]:
+    """Yield the transactions and closing balances of an MT940 stream one at a time.
+
+    The stream is split on statement (``:20:``) and transaction (``:61:``)
+    boundaries. Every transaction is parsed together with its ``:86:``
+    details and the header of its statement, so only a single record is
+    held in memory. The final closing balance (``:62F:``) of a statement is
+    yielded after its transactions.
+    """
+    header: List[str] = []
+    record: List[str] = []
+    section = "header"
+    for line in lines:
+        match = TAG_RE.match(line)
+        tag = match.group("tag") if match else None
+
+        if tag is not None and (tag in ("20", "61") or tag[:2] in CLOSING_TAGS):
+            if record:
+                yield from _parse(header + record).transactions
+                record = []
+
+            if tag == "20":
+                header = []
+                section = "header"
+            elif tag == "61":
+                section = "record"
+            else:
+                section = "trailer"
+
+            if tag == "62F":
+                closing = _parse([line]).data.get("final_closing_balance")
+                if closing is not None:
+                    yield closing
+
+        if section == "header":
+            header.append(line)
+        elif section == "record":
+            record.append(line)
+
+    if record:
+        yield from _parse(header + record).transactions
+
+
+def iter_transactions(lines: Iterable[str]) -> Iterator[mt940.models.Transaction]:
+    """Yield only the transactions of an MT940 stream, see ``iter_records``."""
+    for record in iter_records(lines):
+        if isinstance(record, mt940.models.Transaction):
+            yield record
+
+
+class RewriteRules:
+    """Rewrite rules for a text field, compiled once and applied in a single pass.
+
+    Rules are pairs of a regular expression and a literal replacement. They
+    are combined into one alternation, so where several rules match at the
+    same position the first one wins.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[str, str]]):
+        self.replacements = {}
+        alternatives = []
+        for index, (pattern, replacement) in enumerate(rules):
+            name = f"r{index}"
+            alternatives.append(f"(?P<{name}>{pattern})")
+            self.replacements[name] = replacement
+        self.regex = re.compile("|".join(alternatives)) if alternatives else None
+
+    def _replace(self, match):
+        # the rule's own group encloses any inner groups, so it closes last
+        return self.replacements[match.lastgroup]
+
+    def __call__(self, text: str) -> str:
+        if self.regex is None:
+            return text
+        return self.regex.sub(self._replace, text)
+
 
 class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
     """An importer for MT940 files."""
 
+    # Subclasses declare the rewrites applied to the narration fields
+    extra_details_rules = RewriteRules([])
+    transaction_details_rules = RewriteRules([])
+
     def __init__(self, regexps, account):
         identifier.IdentifyMixin.__init__(self, matchers=[("filename", regexps)])
         self.account = account
@@ -23,46 +129,70 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
 
     def extract(self, file, existing_entries):
         entries = []
-        transactions = mt940.parse(file.contents())
-        for trx in transactions:
-            trxdata = trx.data
-            ref = trxdata["bank_reference"]
-            if ref:
-                metakv = {"ref": ref}
-            else:
-                metakv = None
-            meta = data.new_metadata(file.name, 0, metakv)
-            if "entry_date" in trxdata:
-                date = trxdata["entry_date"]
-            else:
-                date = trxdata["date"]
-            entry = data.Transaction(
-                meta,
-                date,
-                "*",
-                self.prepare_payee(trxdata),
-                self.prepare_narration(trxdata),
-                data.EMPTY_SET,
-                data.EMPTY_SET,
-                [
-                    data.Posting(
-                        self.account,
-                        amount.Amount(
-                            D(trxdata["amount"].amount), trxdata["amount"].currency
-                        ),
-                        None,
-                        None,
-                        None,
-                        None,
-                    ),
-                ],
-            )
-            entries.append(entry)
+        with open(file.name, "rb") as stream:
+            for record in iter_records(decode_lines(stream)):
+                if isinstance(record, mt940.models.Balance):
+                    entries.append(self.create_balance(file, record))
+                else:
+                    entries.append(self.create_entry(file, record))
 
         return entries
 
+    def create_entry(self, file, trx):
+        trxdata = trx.data
+        ref = trxdata["bank_reference"]
+        if ref:
+            metakv = {"ref": ref}
+        else:
+            metakv = None
+        meta = data.new_metadata(file.name, 0, metakv)
+        if "entry_date" in trxdata:
+            date = trxdata["entry_date"]
+        else:
+            date = trxdata["date"]
+        return data.Transaction(
+            meta,
+            date,
+            "*",
+            self.prepare_payee(trxdata),
+            self.prepare_narration(trxdata),
+            data.EMPTY_SET,
+            data.EMPTY_SET,
+            [
+                data.Posting(
+                    self.account,
+                    amount.Amount(
+                        D(trxdata["amount"].amount), trxdata["amount"].currency
+                    ),
+                    None,
+                    None,
+                    None,
+                    None,
+                ),
+            ],
+        )
+
+    def create_balance(self, file, balance):
+        # the closing balance is at the end of the day, beancount checks at the start
+        return data.Balance(
+            data.new_metadata(file.name, 0),
+            balance.date + timedelta(days=1),
+            self.account,
+            amount.Amount(D(balance.amount.amount), balance.amount.currency),
+            None,
+            None,
+        )
+
     def prepare_payee(self, trxdata):
         return ""
 
     def prepare_narration(self, trxdata):
-        return trxdata["transaction_details"] + " " + trxdata["extra_details"]
+        extra, details = self.rewrite_details(trxdata)
+        return details + " " + extra
+
+    def rewrite_details(self, trxdata):
+        """Return the extra and transaction details with the rules applied."""
+        return (
+            self.extra_details_rules(trxdata["extra_details"]),
+            self.transaction_details_rules(trxdata["transaction_details"]),
+        )
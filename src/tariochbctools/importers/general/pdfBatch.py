@@ -0,0 +1,83 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from beancount.ingest import cache
+
+_pool = None
+_poolWorkers = None
+
+
+def _warm_up():
+    # camelot pulls in opencv, ghostscript bindings and the pdf backends on
+    # import, so do it once per worker instead of once per statement
+    import camelot  # noqa: F401
+
+
+def get_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Return the shared pool of warm PDF workers, creating it if needed.
+
+    The pool is kept alive between calls so that subsequent batches reuse
+    the already initialised worker processes.
+    """
+    global _pool, _poolWorkers
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if _pool is None or _poolWorkers != max_workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_warm_up)
+        _poolWorkers = max_workers
+
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the shared worker pool."""
+    global _pool, _poolWorkers
+
+    if _pool is not None:
+        _pool.shutdown()
+    _pool = None
+    _poolWorkers = None
+
+
+class PdfBatchMixin:
+    """Batch extraction for importers that convert a PDF statement to a CSV file.
+
+    Importers using this mixin set ``pdf_to_csv`` to their module level
+    conversion function, it is executed in the worker processes.
+    """
+
+    pdf_to_csv: Callable[[str, str], None]
+
+    def extract_batch(
+        self,
+        files: Iterable,
+        existing_entries=None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, List]:
+        """Extract many statements, converting the PDFs in parallel.
+
+        Accepts file names or file memos and returns the entries per file
+        name, in the order the files were given.
+        """
+        memos = [cache.get_file(f) if isinstance(f, (str, Path)) else f for f in files]
+
+        pending = {}
+        for memo in memos:
+            csv_file = Path(memo.name).with_suffix(".csv")
+            if not csv_file.is_file() and memo.name not in pending:
+                pending[memo.name] = str(csv_file)
+
+        if pending:
+            pool = get_pool(max_workers)
+            futures = [
+                pool.submit(self.pdf_to_csv, pdf_file, csv_file)
+                for pdf_file, csv_file in pending.items()
+            ]
+            for future in futures:
+                future.result()
+
+        return {memo.name: self.extract(memo, existing_entries) for memo in memos}
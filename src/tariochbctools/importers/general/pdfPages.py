@@ -0,0 +1,35 @@
+import time
+from typing import Iterator, Optional, Tuple
+
+import camelot
+from pypdf import PdfReader
+
+from tariochbctools.importers.general.pdfReport import ParseReport
+
+
+def page_count(pdf_file_name: str) -> int:
+    return len(PdfReader(pdf_file_name).pages)
+
+
+def iter_page_tables(
+    pdf_file_name: str,
+    first_page: dict,
+    other_pages: dict,
+    report: Optional[ParseReport] = None,
+) -> Iterator[Tuple[int, camelot.core.TableList]]:
+    """Read the tables of a statement one page at a time.
+
+    ``first_page`` and ``other_pages`` are the keyword arguments passed to
+    ``camelot.read_pdf`` for the first and for all following pages. Only the
+    tables of the current page are held in memory. If a ``report`` is given,
+    parse time and table count are recorded for every page.
+    """
+    for page in range(1, page_count(pdf_file_name) + 1):
+        kwargs = first_page if page == 1 else other_pages
+        start = time.perf_counter()
+        tables = camelot.read_pdf(pdf_file_name, pages=str(page), **kwargs)
+        if report is not None:
+            pageReport = report.page(page)
+            pageReport.parse_time = time.perf_counter() - start
+            pageReport.table_count = len(tables)
+        yield page, tables
@@ -0,0 +1,119 @@
+import logging
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from typing import List, Optional
+
+
+@dataclass
+class RejectedRow:
+    table: int
+    row: int
+    reason: str
+
+
+@dataclass
+class BalanceCheck:
+    table: int
+    row: int
+    expected: Decimal
+    actual: Decimal
+
+    @property
+    def ok(self) -> bool:
+        return self.expected == self.actual
+
+
+@dataclass
+class PageReport:
+    page: int
+    parse_time: float = 0.0
+    table_count: int = 0
+    rows_accepted: int = 0
+    rows_rejected: List[RejectedRow] = field(default_factory=list)
+    balance_checks: List[BalanceCheck] = field(default_factory=list)
+
+    def accept(self, count: int = 1):
+        self.rows_accepted += count
+
+    def reject(self, table: int, row: int, reason: str):
+        self.rows_rejected.append(RejectedRow(table, row, reason))
+
+    def check_balance(self, table: int, row: int, expected: Decimal, actual: Decimal):
+        self.balance_checks.append(BalanceCheck(table, row, expected, actual))
+
+
+@dataclass
+class ParseReport:
+    """What happened while parsing a PDF statement, page by page."""
+
+    file_name: str
+    pages: List[PageReport] = field(default_factory=list)
+
+    def page(self, number: int) -> PageReport:
+        for page in self.pages:
+            if page.page == number:
+                return page
+
+        page = PageReport(number)
+        self.pages.append(page)
+        return page
+
+    @property
+    def parse_time(self) -> float:
+        return sum(page.parse_time for page in self.pages)
+
+    @property
+    def rows_accepted(self) -> int:
+        return sum(page.rows_accepted for page in self.pages)
+
+    @property
+    def rows_rejected(self) -> List[RejectedRow]:
+        return [row for page in self.pages for row in page.rows_rejected]
+
+    @property
+    def failed_balance_checks(self) -> List[BalanceCheck]:
+        return [
+            check
+            for page in self.pages
+            for check in page.balance_checks
+            if not check.ok
+        ]
+
+    def slowest_pages(self, count: int = 3) -> List[PageReport]:
+        return sorted(self.pages, key=lambda p: p.parse_time, reverse=True)[:count]
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def log(self, logger: Optional[logging.Logger] = None):
+        logger = logger or logging.getLogger(__name__)
+        for page in self.pages:
+            logger.debug(
+                "%s page %d: %.3fs, %d tables, %d rows accepted, %d rejected, %d balance checks failed",
+                self.file_name,
+                page.page,
+                page.parse_time,
+                page.table_count,
+                page.rows_accepted,
+                len(page.rows_rejected),
+                len([check for check in page.balance_checks if not check.ok]),
+            )
+            for rejected in page.rows_rejected:
+                logger.debug(
+                    "%s page %d table %d row %d rejected: %s",
+                    self.file_name,
+                    page.page,
+                    rejected.table,
+                    rejected.row,
+                    rejected.reason,
+                )
+
+        for check in self.failed_balance_checks:
+            logger.warning(
+                "%s table %d row %d: expected balance %s but statement shows %s",
+                self.file_name,
+                check.table,
+                check.row,
+                check.expected,
+                check.actual,
+            )
@@ -0,0 +1,79 @@
+from typing import Sequence, Tuple
+
+import pandas as pd
+from beancount.core.number import D
+from unidecode import unidecode
+
+DATE_FORMATS = ("%d.%m.%Y", "%d.%m.%y")
+
+AMOUNT_RE = r"-?\d+(?:\.\d+)?"
+
+# Never produced by unidecode, used to transliterate a whole column in one call
+_SEPARATOR = "\x1f"
+
+
+def parse_dates(column: pd.Series, formats: Sequence[str] = DATE_FORMATS) -> pd.Series:
+    """Parse a column of date strings, trying each fixed format in turn.
+
+    Cells not matching any of the formats become ``NaT``.
+    """
+    dates = pd.to_datetime(column, format=formats[0], errors="coerce")
+    for fmt in formats[1:]:
+        missing = dates.isna()
+        if not missing.any():
+            break
+        dates[missing] = pd.to_datetime(column[missing], format=fmt, errors="coerce")
+    return dates
+
+
+def clean_amounts(column: pd.Series) -> pd.Series:
+    """Drop thousands separators, currency and whitespace from amount strings."""
+    return column.str.replace(r"['\s]|CHF", "", regex=True)
+
+
+def transliterate(column: pd.Series) -> pd.Series:
+    """Transliterate a column of strings to ASCII."""
+    if column.empty:
+        return column
+    return pd.Series(
+        unidecode(_SEPARATOR.join(column)).split(_SEPARATOR), index=column.index
+    )
+
+
+def postprocess_table(
+    df: pd.DataFrame,
+    columns: Sequence[str],
+    date: str,
+    amounts: Sequence[str],
+    text: str,
+    date_formats: Sequence[str] = DATE_FORMATS,
+    ascii_text: bool = False,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Clean up a raw table read from a PDF statement in bulk.
+
+    Names the columns, strips all cells, parses the ``date`` column, converts
+    the ``amounts`` columns to decimals (empty cells become zero) and joins
+    multi-line cells of the ``text`` column.
+
+    Returns the transaction rows, those with a valid date and valid amounts,
+    and the remaining rows which are left as strings.
+    """
+    df = df.reset_index(drop=True)
+    df.columns = columns
+    df = df.apply(lambda c: c.astype(str).str.strip())
+    df[text] = df[text].str.replace("\n", " ", regex=False)
+
+    dates = parse_dates(df[date], date_formats)
+    mask = dates.notna()
+    for column in amounts:
+        df[column] = clean_amounts(df[column])
+        mask &= df[column].str.fullmatch(AMOUNT_RE) | (df[column] == "")
+
+    transactions = df[mask].copy()
+    transactions[date] = dates[mask].dt.date
+    for column in amounts:
+        transactions[column] = transactions[column].map(D)
+    if ascii_text:
+        transactions[text] = transliterate(transactions[text])
+
+    return transactions, df[~mask]
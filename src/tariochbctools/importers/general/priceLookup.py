@@ -1,6 +1,11 @@
+from bisect import bisect_right
+from collections import defaultdict
 from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
 
 from beancount.core import amount, prices
+from beancount.core.number import ONE
 
 
 class PriceLookup:
@@ -12,6 +17,34 @@ class PriceLookup:
         price = prices.get_price(self.priceMap, tuple([instrument, self.baseCcy]), date)
         return price[1]
 
+    def fetchPriceAmounts(
+        self, lookups: Iterable[Tuple[str, date]]
+    ) -> Dict[Tuple[str, date], Optional[Decimal]]:
+        """The prices of many (instrument, date) pairs, as ``fetchPriceAmount``
+        would return them, looking up the prices of every instrument once."""
+        dates = defaultdict(set)
+        for instrument, day in lookups:
+            dates[instrument].add(day)
+
+        result = {}
+        for instrument, days in dates.items():
+            if instrument == self.baseCcy:
+                result.update(((instrument, day), ONE) for day in days)
+                continue
+
+            try:
+                priceList = prices.get_all_prices(
+                    self.priceMap, (instrument, self.baseCcy)
+                )
+            except KeyError:
+                priceList = []
+            priceDates = [priceDate for priceDate, _ in priceList]
+            for day in days:
+                index = bisect_right(priceDates, day)
+                result[(instrument, day)] = priceList[index - 1][1] if index else None
+
+        return result
+
     def fetchPrice(self, instrument: str, date: date):
         if instrument == self.baseCcy:
             return None
@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional, Union
+
+
+def default_state_dir() -> Path:
+    """Directory where importers keep state between runs."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "tariochbctools"
+
+
+class JsonStateStore:
+    """A small key/value store persisted as a JSON file.
+
+    Values must be JSON serializable. Every write re-reads the file first so
+    that separate processes sharing the store do not drop each others keys.
+    """
+
+    def __init__(self, name: str, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path else default_state_dir() / (name + ".json")
+
+    def load(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.load().get(key, default)
+
+    def set(self, key: str, value: Any):
+        self.update({key: value})
+
+    def update(self, values: dict):
+        content = self.load()
+        content.update(values)
+        self._write(content)
+
+    def delete(self, key: str):
+        content = self.load()
+        if content.pop(key, None) is not None:
+            self._write(content)
+
+    def _write(self, content: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmpName = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(content, f, indent=2, sort_keys=True)
+        os.replace(tmpName, self.path)
@@ -0,0 +1,147 @@
+import argparse
+import os
+import sys
+from hashlib import sha1
+from typing import List, Optional
+
+from tariochbctools.importers.general.stateStore import JsonStateStore
+
+# Bytes next to the boundary of the imported rows compared on the next run
+WINDOW = 4096
+
+# Prefix of the marks of extracted rows, until they are committed
+PENDING = "pending:"
+
+
+def _digest(content: bytes) -> str:
+    return sha1(content).hexdigest()
+
+
+def watermark_key(importer_name: str, account: str, file_name: str) -> str:
+    return ":".join([importer_name, account, os.path.abspath(file_name)])
+
+
+class Watermark:
+    """Remembers how far a growing CSV export has been imported.
+
+    Exports growing at the end are read from the recorded size on, exports
+    growing at the top (``newest_first``) only up to the rows imported
+    before. The header and the rows next to the boundary are compared with
+    the last run, if the file does not continue the imported one it is read
+    completely again.
+
+    The rows returned by ``read`` are only staged by ``stage``, they count
+    as imported once ``commit_pending`` is called after the extracted entries
+    were saved, so a preview does not skip them on the next run.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        newest_first: bool = False,
+        store: Optional[JsonStateStore] = None,
+    ):
+        self.key = key
+        self.newest_first = newest_first
+        self.store = store or JsonStateStore("watermarks")
+        self._pending = None
+
+    def read(self, file_name: str) -> str:
+        """Return the header and the rows not imported yet."""
+        with open(file_name, "rb") as f:
+            header = f.readline()
+            start = len(header)
+            size = os.fstat(f.fileno()).st_size
+
+            body = self._read_new(f, _digest(header), start, size)
+
+            window = min(WINDOW, size - start)
+            f.seek(start if self.newest_first else size - window)
+            self._pending = {
+                "size": size,
+                "header": _digest(header),
+                "window": window,
+                "boundary": _digest(f.read(window)),
+            }
+
+        return (header + body).decode("utf-8")
+
+    def _read_new(self, f, header: str, start: int, size: int) -> bytes:
+        mark = self.store.get(self.key)
+        if mark and mark["header"] == header and mark["size"] <= size:
+            new = size - mark["size"]
+            f.seek(start + new if self.newest_first else mark["size"] - mark["window"])
+            if _digest(f.read(mark["window"])) == mark["boundary"]:
+                if self.newest_first:
+                    f.seek(start)
+                    return f.read(new)
+                return f.read()
+
+        f.seek(start)
+        return f.read()
+
+    def stage(self, last=None):
+        """Record the rows returned by ``read`` as extracted.
+
+        ``last`` is the id or date of the newest row, kept for information.
+        """
+        if self._pending is None:
+            return
+        if last is not None:
+            self._pending["last"] = str(last)
+        self.store.set(PENDING + self.key, self._pending)
+        self._pending = None
+
+
+def _pending(store: JsonStateStore) -> dict:
+    """The staged marks by the key of their export."""
+    return {
+        key.replace(PENDING, "", 1): mark
+        for key, mark in store.load().items()
+        if key.startswith(PENDING)
+    }
+
+
+def commit_pending(store: Optional[JsonStateStore] = None) -> List[str]:
+    """Record the staged rows of all exports as imported, return their keys."""
+    store = store or JsonStateStore("watermarks")
+    pending = _pending(store)
+    store.update(pending)
+    for key in pending:
+        store.delete(PENDING + key)
+    return list(pending)
+
+
+def discard_pending(store: Optional[JsonStateStore] = None) -> List[str]:
+    """Forget the staged rows of all exports, return their keys."""
+    store = store or JsonStateStore("watermarks")
+    pending = _pending(store)
+    for key in pending:
+        store.delete(PENDING + key)
+    return list(pending)
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(description="csv-watermarks")
+    parser.add_argument(
+        "mode",
+        choices=["commit", "discard"],
+        help="commit the rows of the last extract once saved, or discard them",
+    )
+    return parser.parse_args(args)
+
+
+def main(args):
+    args = parse_args(args)
+
+    if args.mode == "commit":
+        keys = commit_pending()
+    else:
+        keys = discard_pending()
+    for key in keys:
+        print(args.mode + ": " + key)  # noqa: T201
+
+
+def run():
+    """Entry point for console_scripts"""
+    main(sys.argv[1:])
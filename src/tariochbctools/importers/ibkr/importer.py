@@ -19,8 +19,9 @@ from beancount.ingest.importers.mixins import identifier
 from ibflex import Types, client, parser
 from ibflex.enums import CashAction
 from csv import DictReader
-from dateutil.parser import parse
 
+from tariochbctools.importers.general.dateParser import DateParser
+from tariochbctools.importers.general.dedupIndex import dedup_index
 from tariochbctools.importers.general.priceLookup import PriceLookup
 
 cash_commodities = [
@@ -311,10 +312,11 @@ class CsvImporter(identifier.IdentifyMixin, importer.ImporterProtocol):
                 ],
                 delimiter=","
             )
+            parse_date = DateParser()
             for row in reader:
                 # Parse
                 category = row['Type']
-                book_date = parse(row["Date"].strip()).date()
+                book_date = parse_date(row["Date"])
                 meta = data.new_metadata(file.name, reader.line_num)
                 meta['document'] = '{}-12-31-InteractiveBrokers_ActivityReport.pdf'.format(book_date.year)
                 meta['trans_id'] = row['Id']
@@ -592,7 +594,7 @@ class CsvImporter(identifier.IdentifyMixin, importer.ImporterProtocol):
             if index not in indexes:
                 logging.warning('Unmatched withholding tax for {} on {}, value {}'.format(tax[0], tax[1], tax[2]))
 
-
+        dedup_index(existing_entries).mark_all(entries, 'trans_id', self.parent_account)
         return entries
 
     def build_fifo_postings(
@@ -1,11 +1,29 @@
-import csv
-from io import StringIO
-
 from beancount.core import amount, data, position
-from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
-from dateutil.parser import parse
+
+from tariochbctools.importers.general import csvColumns
+
+FIELDNAMES = [
+    "Booking Date",
+    "Value Date",
+    "Partner Name",
+    "Partner Iban",
+    "Type",
+    "Payment Reference",
+    "Account Name",
+    "Amount (EUR)",
+    "Original Amount",
+    "Original Currency",
+    "Exchange Rate"
+]
+
+SCHEMA = {
+    "Booking Date": csvColumns.DATE,
+    "Partner Name": csvColumns.TEXT,
+    "Payment Reference": csvColumns.TEXT,
+    "Amount (EUR)": csvColumns.DECIMAL,
+}
 
 
 class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
@@ -25,33 +43,23 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
         entries = []
 
         with open(file.name, 'r', encoding='utf8') as csvfile:
-            reader = csv.DictReader(
-                csvfile,
-                [
-                    "Booking Date",
-                    "Value Date",
-                    "Partner Name",
-                    "Partner Iban",
-                    "Type",
-                    "Payment Reference",
-                    "Account Name",
-                    "Amount (EUR)",
-                    "Original Amount",
-                    "Original Currency",
-                    "Exchange Rate"
-                ],
-                delimiter=","
-            )
-            rows = list(reader)[1:]
+            try:
+                columns = csvColumns.read_columns(csvfile, SCHEMA, FIELDNAMES, delimiter=",")
+            except ValueError as e:
+                raise Warning('Error parsing file {}\n{}'.format(file.name, e))
 
+        rows = zip(
+            columns["Booking Date"],
+            columns["Partner Name"],
+            columns["Payment Reference"],
+            columns["Amount (EUR)"],
+        )
         for index, row in enumerate(rows):
             try:
                 # Parse transaction
+                book_date, payee, description, amt = row
                 meta = data.new_metadata(file.name, index)
-                book_date = parse(row['Booking Date'].strip()).date()
-                payee = row["Partner Name"].strip()
-                description = row["Payment Reference"].strip() if row["Payment Reference"] else ""
-                units = amount.Amount(D(row["Amount (EUR)"]), "EUR")
+                units = amount.Amount(amt, "EUR")
                 cost = None
 
                 #original_currency = row["Original Currency"]
@@ -1,11 +1,21 @@
-import csv
-from io import StringIO
-
 from beancount.core import amount, data
-from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
-from dateutil.parser import parse
+
+from tariochbctools.importers.general import csvColumns
+
+FIELDNAMES = ["Date", "Amount", "Original amount", "Original currency", "Exchange rate", "Description", "Subject",
+              "Category", "Tags", "Wise", "Spaces"]
+
+SCHEMA = {
+    "Date": csvColumns.DATE,
+    "Amount": csvColumns.DECIMAL,
+    "Original amount": csvColumns.TEXT,
+    "Original currency": csvColumns.TEXT,
+    "Exchange rate": csvColumns.TEXT,
+    "Description": csvColumns.TEXT,
+    "Category": csvColumns.TEXT,
+}
 
 
 class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
@@ -26,30 +36,35 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
         entries = []
 
         with open(file.name, 'r', encoding='utf8') as csvfile:
-            reader = csv.DictReader(
-                csvfile,
-                ["Date", "Amount", "Original amount", "Original currency", "Exchange rate", "Description", "Subject",
-                 "Category", "Tags", "Wise", "Spaces"],
-                delimiter=";"
-            )
-            rows = list(reader)[1:]
+            try:
+                columns = csvColumns.read_columns(csvfile, SCHEMA, FIELDNAMES, delimiter=";")
+            except ValueError as e:
+                raise Warning('Error parsing file {}\n{}'.format(file.name, e))
 
-        for index, row in enumerate(reversed(rows)):
+        rows = zip(
+            columns["Date"],
+            columns["Amount"],
+            columns["Original amount"],
+            columns["Original currency"],
+            columns["Exchange rate"],
+            columns["Description"],
+            columns["Category"],
+        )
+        for index, row in enumerate(reversed(list(rows))):
             try:
                 # Parse transaction
+                book_date, amt, original_amount, original_currency, exchange_rate, description, category = row
                 meta = data.new_metadata(file.name, index)
-                book_date = parse(row['Date'].strip()).date()
-                amt = amount.Amount(D(row["Amount"]), "CHF")
+                amt = amount.Amount(amt, "CHF")
                 metakv = {
-                    "category": row["Category"],
+                    "category": category,
                 }
-                if row["Original currency"] != "":
-                    metakv["original_currency"] = row["Original currency"]
-                    metakv["original_amount"] = row["Original amount"]
-                    metakv["exchange_rate"] = row["Exchange rate"]
+                if original_currency != "":
+                    metakv["original_currency"] = original_currency
+                    metakv["original_amount"] = original_amount
+                    metakv["exchange_rate"] = exchange_rate
 
                 meta_posting = data.new_metadata(file.name, 0, metakv)
-                description = row["Description"].strip()
                 if description in self.map:
                     payee = self.map[description][0]
                     note = self.map[description][1]
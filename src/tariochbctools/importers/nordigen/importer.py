@@ -1,4 +1,8 @@
-from datetime import date
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 from os import path
 
 import requests
@@ -7,14 +11,65 @@ from beancount.core import amount, data
 from beancount.core.number import D
 from beancount.ingest import importer
 
+from tariochbctools.importers.general.dedupIndex import dedup_index
+from tariochbctools.importers.general.httpSession import RETRY_STATUSES, create_session
+from tariochbctools.importers.general.stateStore import JsonStateStore
+from tariochbctools.importers.nordigen.nordigen_config import (
+    API_URL,
+    HttpServiceException,
+    build_header,
+    forget_token,
+    get_token,
+)
 
-class HttpServiceException(Exception):
-    pass
+# Accounts whose transactions are fetched at the same time
+MAX_WORKERS = 4
+
+# Longest wait in seconds for a rate limit to reset, else the account is skipped
+MAX_WAIT = 60
+
+# Requests answered with 429 which are retried after the wait
+MAX_RETRIES = 3
+
+# Rate limit headers, per client and per account, with _LIMIT, _REMAINING
+# and _RESET (seconds) suffixes
+RATELIMIT = "HTTP_X_RATELIMIT"
+ACCOUNT_RATELIMIT = "HTTP_X_RATELIMIT_ACCOUNT_SUCCESS"
+
+
+def _header_int(headers, name):
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def retry_after(headers):
+    """Seconds to wait before a rate limited request may be retried."""
+    for name in ("Retry-After", ACCOUNT_RATELIMIT + "_RESET", RATELIMIT + "_RESET"):
+        wait = _header_int(headers, name)
+        if wait is not None:
+            return wait
+    return None
 
 
 class Importer(importer.ImporterProtocol):
     """An importer for Nordigen API (e.g. for Revolut)."""
 
+    def __init__(self):
+        # 429 is handled here, the account limits reset only after hours
+        self.session = create_session(
+            status_forcelist=[s for s in RETRY_STATUSES if s != 429]
+        )
+        self.state = JsonStateStore("nordigen")
+        self.max_workers = MAX_WORKERS
+        self.max_wait = MAX_WAIT
+        self.quota = {}
+        self.secret_id = None
+        self.secret_key = None
+        self.headers = None
+        self.token_lock = threading.Lock()
+
     def identify(self, file):
         return path.basename(file.name).endswith("nordigen.yaml")
 
@@ -24,80 +79,154 @@ class Importer(importer.ImporterProtocol):
     def extract(self, file, existing_entries):
         with open(file.name, "r") as f:
             config = yaml.safe_load(f)
+        self.max_workers = config.get("max_workers", MAX_WORKERS)
+        self.max_wait = config.get("max_wait", MAX_WAIT)
+        self.quota = self.state.get("quota", {})
 
-        r = requests.post(
-            "https://ob.nordigen.com/api/v2/token/new/",
-            data={
-                "secret_id": config["secret_id"],
-                "secret_key": config["secret_key"],
-            },
-        )
-        try:
-            r.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            raise HttpServiceException(e, e.response.text)
+        self.secret_id = config["secret_id"]
+        self.secret_key = config["secret_key"]
+        self.headers = None
 
-        token = r.json()["access"]
-        headers = {"Authorization": "Bearer " + token}
+        # accounts are fetched concurrently, in their original order
+        accounts = config["accounts"]
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                results = list(
+                    pool.map(
+                        lambda account: self._fetch_transactions(account["id"]),
+                        accounts,
+                    )
+                )
+        finally:
+            self.state.set("quota", self.quota)
 
+        dedup = dedup_index(existing_entries)
         entries = []
-        for account in config["accounts"]:
-            accountId = account["id"]
+        for account, transactions in zip(accounts, results):
             assetAccount = account["asset_account"]
-            r = requests.get(
-                f"https://ob.nordigen.com/api/v2/accounts/{accountId}/transactions/",
-                headers=headers,
+            for trx in transactions:
+                entry = self._extract_transaction(trx, assetAccount)
+                dedup.mark(entry, "nordref", assetAccount)
+                entries.append(entry)
+
+        return entries
+
+    def _exhausted(self, accountId):
+        """Whether the recorded quota of an account is used up."""
+        quota = self.quota.get(accountId)
+        return (
+            quota is not None
+            and quota["remaining"] == 0
+            and datetime.fromisoformat(quota["reset"]) > datetime.now(timezone.utc)
+        )
+
+    def _record_quota(self, accountId, headers):
+        remaining = _header_int(headers, ACCOUNT_RATELIMIT + "_REMAINING")
+        if remaining is None:
+            return
+        reset = datetime.now(timezone.utc) + timedelta(
+            seconds=_header_int(headers, ACCOUNT_RATELIMIT + "_RESET") or 0
+        )
+        self.quota[accountId] = {
+            "remaining": remaining,
+            "reset": reset.replace(microsecond=0).isoformat(),
+        }
+
+    def _authorize(self, rejected=None):
+        """The authorization headers, renewed if the API ``rejected`` them."""
+        with self.token_lock:
+            if self.headers is None or self.headers is rejected:
+                if rejected is not None:
+                    forget_token(self.secret_id, self.state)
+                self.headers = build_header(
+                    get_token(self.secret_id, self.secret_key, self.session, self.state)
+                )
+            return self.headers
+
+    def _fetch_transactions(self, accountId):
+        """The booked transactions of an account, empty if it is rate limited."""
+        if self._exhausted(accountId):
+            logging.warning(
+                "Skipping account %s, its rate limit resets at %s",
+                accountId,
+                self.quota[accountId]["reset"],
             )
-            try:
-                r.raise_for_status()
-            except requests.exceptions.HTTPError as e:
-                raise HttpServiceException(e, e.response.text)
+            return []
 
-            transactions = sorted(
-                r.json()["transactions"]["booked"], key=lambda trx: trx["bookingDate"]
+        headers = self._authorize()
+        renewed = False
+        retries = 0
+        while True:
+            r = self.session.get(
+                f"{API_URL}/accounts/{accountId}/transactions/",
+                headers=headers,
             )
-            for trx in transactions:
-                metakv = {
-                    "nordref": trx["transactionId"],
-                }
-                if "creditorName" in trx:
-                    metakv["creditorName"] = trx["creditorName"]
-                if "debtorName" in trx:
-                    metakv["debtorName"] = trx["debtorName"]
-                if "currencyExchange" in trx:
-                    instructedAmount = trx["currencyExchange"]["instructedAmount"]
-                    metakv["original"] = (
-                        instructedAmount["currency"] + " " + instructedAmount["amount"]
-                    )
-                meta = data.new_metadata("", 0, metakv)
-                trxDate = date.fromisoformat(trx["bookingDate"])
-                narration = ""
-                if "remittanceInformationUnstructured" in trx:
-                    narration += trx["remittanceInformationUnstructured"]
-                if "remittanceInformationUnstructuredArray" in trx:
-                    narration += " ".join(trx["remittanceInformationUnstructuredArray"])
-                entry = data.Transaction(
-                    meta,
-                    trxDate,
-                    "*",
-                    "",
-                    narration,
-                    data.EMPTY_SET,
-                    data.EMPTY_SET,
-                    [
-                        data.Posting(
-                            assetAccount,
-                            amount.Amount(
-                                D(str(trx["transactionAmount"]["amount"])),
-                                trx["transactionAmount"]["currency"],
-                            ),
-                            None,
-                            None,
-                            None,
-                            None,
-                        ),
-                    ],
+            self._record_quota(accountId, r.headers)
+            if r.status_code in (401, 403) and not renewed:
+                # a revoked or rotated token, renewed once
+                headers = self._authorize(headers)
+                renewed = True
+                continue
+            if r.status_code != 429 or retries == MAX_RETRIES:
+                break
+            retries += 1
+
+            wait = retry_after(r.headers)
+            if wait is None or wait > self.max_wait:
+                logging.warning(
+                    "Skipping account %s, rate limited for %s seconds", accountId, wait
                 )
-                entries.append(entry)
+                return []
+            time.sleep(wait)
 
-        return entries
+        try:
+            r.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            raise HttpServiceException(e, e.response.text)
+
+        return sorted(
+            r.json()["transactions"]["booked"], key=lambda trx: trx["bookingDate"]
+        )
+
+    def _extract_transaction(self, trx, assetAccount):
+        metakv = {
+            "nordref": trx["transactionId"],
+        }
+        if "creditorName" in trx:
+            metakv["creditorName"] = trx["creditorName"]
+        if "debtorName" in trx:
+            metakv["debtorName"] = trx["debtorName"]
+        if "currencyExchange" in trx:
+            instructedAmount = trx["currencyExchange"]["instructedAmount"]
+            metakv["original"] = (
+                instructedAmount["currency"] + " " + instructedAmount["amount"]
+            )
+        meta = data.new_metadata("", 0, metakv)
+        trxDate = date.fromisoformat(trx["bookingDate"])
+        narration = ""
+        if "remittanceInformationUnstructured" in trx:
+            narration += trx["remittanceInformationUnstructured"]
+        if "remittanceInformationUnstructuredArray" in trx:
+            narration += " ".join(trx["remittanceInformationUnstructuredArray"])
+        return data.Transaction(
+            meta,
+            trxDate,
+            "*",
+            "",
+            narration,
+            data.EMPTY_SET,
+            data.EMPTY_SET,
+            [
+                data.Posting(
+                    assetAccount,
+                    amount.Amount(
+                        D(str(trx["transactionAmount"]["amount"])),
+                        trx["transactionAmount"]["currency"],
+                    ),
+                    None,
+                    None,
+                    None,
+                    None,
+                ),
+            ],
+        )
@@ -1,8 +1,28 @@
 import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
 import requests
 
+from tariochbctools.importers.general.httpSession import get_session
+from tariochbctools.importers.general.stateStore import JsonStateStore
+
+API_URL = "https://bankaccountdata.gocardless.com/api/v2"
+
+# Seconds before their expiry from which cached tokens are not used anymore
+EXPIRY_MARGIN = 60
+
+# How long the institutions of a country are cached
+INSTITUTIONS_TTL = timedelta(days=1)
+
+# Accounts whose details are fetched at the same time
+MAX_WORKERS = 8
+
+
+class HttpServiceException(Exception):
+    pass
+
 
 def build_header(token):
     return {"Authorization": "Bearer " + token}
@@ -12,12 +32,50 @@ def check_result(result):
     try:
         result.raise_for_status()
     except requests.exceptions.HTTPError as e:
-        raise Exception(e, e.response.text)
+        raise HttpServiceException(e, e.response.text)
+
+
+def _with_expiry(tokens, now):
+    """The tokens of a /token/ answer with their expiry as timestamps."""
+    result = {}
+    for name in ("access", "refresh"):
+        if name in tokens:
+            expires = now + timedelta(seconds=tokens[name + "_expires"] - EXPIRY_MARGIN)
+            result[name] = tokens[name]
+            result[name + "_expires"] = expires.isoformat()
+    return result
 
 
-def get_token(secret_id, secret_key):
-    r = requests.post(
-        "https://bankaccountdata.gocardless.com/api/v2/token/new/",
+def _is_valid(tokens, name, now):
+    return name in tokens and datetime.fromisoformat(tokens[name + "_expires"]) > now
+
+
+def get_token(secret_id, secret_key, session=None, store=None):
+    """Return an access token, cached until it expires.
+
+    An expired access token is renewed with the refresh token, new tokens
+    are only requested once that one expired as well.
+    """
+    session = session or get_session()
+    store = store or JsonStateStore("nordigen")
+    key = "token:" + secret_id
+    tokens = store.get(key, {})
+    now = datetime.now(timezone.utc)
+
+    if _is_valid(tokens, "access", now):
+        return tokens["access"]
+
+    if _is_valid(tokens, "refresh", now):
+        r = session.post(
+            API_URL + "/token/refresh/", data={"refresh": tokens["refresh"]}
+        )
+        if r.ok:
+            tokens.update(_with_expiry(r.json(), now))
+            store.set(key, tokens)
+            return tokens["access"]
+
+    r = session.post(
+        API_URL + "/token/new/",
         data={
             "secret_id": secret_id,
             "secret_key": secret_key,
@@ -25,18 +83,46 @@ def get_token(secret_id, secret_key):
     )
     check_result(r)
 
-    return r.json()["access"]
+    tokens = _with_expiry(r.json(), now)
+    store.set(key, tokens)
+    return tokens["access"]
+
 
+def forget_token(secret_id, store=None):
+    """Drop the cached tokens, e.g. after they were revoked."""
+    store = store or JsonStateStore("nordigen")
+    store.delete("token:" + secret_id)
 
-def list_bank(token, country):
-    r = requests.get(
-        "https://bankaccountdata.gocardless.com/api/v2/institutions/",
+
+def get_institutions(token, country, refresh=False, session=None, store=None):
+    """The institutions of a country, cached for ``INSTITUTIONS_TTL``."""
+    session = session or get_session()
+    store = store or JsonStateStore("nordigen")
+    key = "institutions:" + country
+    now = datetime.now(timezone.utc)
+
+    cached = store.get(key)
+    if (
+        cached
+        and not refresh
+        and datetime.fromisoformat(cached["fetched"]) + INSTITUTIONS_TTL > now
+    ):
+        return cached["institutions"]
+
+    r = session.get(
+        API_URL + "/institutions/",
         params={"country": country},
         headers=build_header(token),
     )
     check_result(r)
 
-    for asp in r.json():
+    institutions = [{"name": asp["name"], "id": asp["id"]} for asp in r.json()]
+    store.set(key, {"fetched": now.isoformat(), "institutions": institutions})
+    return institutions
+
+
+def list_bank(token, country, refresh=False):
+    for asp in get_institutions(token, country, refresh):
         print(asp["name"] + ": " + asp["id"])  # noqa: T201
 
 
@@ -48,7 +134,7 @@ def create_link(token, reference, bank):
         print(f"Link for for reference {reference} already exists.")  # noqa: T201
     else:
         r = requests.post(
-            "https://bankaccountdata.gocardless.com/api/v2/requisitions/",
+            API_URL + "/requisitions/",
             data={
                 "redirect": "http://localhost",
                 "institution_id": bank,
@@ -61,43 +147,48 @@ def create_link(token, reference, bank):
         print(f"Go to {link} for connecting to your bank.")  # noqa: T201
 
 
-def list_accounts(token):
+def _get_account(session, headers, account):
+    """The institution, IBAN, owner and currency of an account."""
+    ra = session.get(f"{API_URL}/accounts/{account}", headers=headers)
+    check_result(ra)
+    acc = ra.json()
+
+    ra = session.get(f"{API_URL}/accounts/{account}/details", headers=headers)
+    check_result(ra)
+    accDetails = ra.json()["account"]
+
+    owner = accDetails["ownerName"] if "ownerName" in accDetails else "-"
+    return acc["institution_id"], owner, acc["iban"], accDetails["currency"]
+
+
+def list_accounts(token, session=None):
+    session = session or get_session()
     headers = build_header(token)
-    r = requests.get(
-        "https://bankaccountdata.gocardless.com/api/v2/requisitions/", headers=headers
-    )
+    r = session.get(API_URL + "/requisitions/", headers=headers)
     print(r.json())  # noqa: T201
     check_result(r)
-    for req in r.json()["results"]:
-        reference = req["reference"]
-        print(f"Reference: {reference}")  # noqa: T201
-        for account in req["accounts"]:
-            ra = requests.get(
-                f"https://bankaccountdata.gocardless.com/api/v2/accounts/{account}",
-                headers=headers,
-            )
-            check_result(ra)
-            acc = ra.json()
-            asp = acc["institution_id"]
-            iban = acc["iban"]
-
-            ra = requests.get(
-                f"https://bankaccountdata.gocardless.com/api/v2/accounts/{account}/details",
-                headers=headers,
-            )
-            check_result(ra)
-            accDetails = ra.json()["account"]
-
-            currency = accDetails["currency"]
-            owner = accDetails["ownerName"] if "ownerName" in accDetails else "-"
-            print(f"{account}: {asp} {owner} {iban} {currency}")  # noqa: T201
+    requisitions = r.json()["results"]
+
+    # the accounts of all requisitions are fetched concurrently, in their order
+    accounts = [account for req in requisitions for account in req["accounts"]]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        details = iter(
+            pool.map(lambda account: _get_account(session, headers, account), accounts)
+        )
+
+        for req in requisitions:
+            reference = req["reference"]
+            print(f"Reference: {reference}")  # noqa: T201
+            for account in req["accounts"]:
+                asp, owner, iban, currency = next(details)
+                print(f"{account}: {asp} {owner} {iban} {currency}")  # noqa: T201
 
 
 def delete_link(token, reference):
     requisitionId = _find_requisition_id(token, reference)
     if requisitionId:
         r = requests.delete(
-            f"https://bankaccountdata.gocardless.com/api/v2/requisitions/{requisitionId}",
+            f"{API_URL}/requisitions/{requisitionId}",
             headers=build_header(token),
         )
         check_result(r)
@@ -105,9 +196,7 @@ def delete_link(token, reference):
 
 def _find_requisition_id(token, userId):
     headers = build_header(token)
-    r = requests.get(
-        "https://bankaccountdata.gocardless.com/api/v2/requisitions/", headers=headers
-    )
+    r = requests.get(API_URL + "/requisitions/", headers=headers)
     check_result(r)
     for req in r.json()["results"]:
         if req["reference"] == userId:
@@ -142,6 +231,11 @@ def parse_args(args):
         "--bank",
         help="Bank to connect to, see list_banks",
     )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore the cached institutions for list_banks",
+    )
     parser.add_argument(
         "mode",
         choices=[
@@ -160,7 +254,7 @@ def main(args):
     token = get_token(args.secret_id, args.secret_key)
 
     if args.mode == "list_banks":
-        list_bank(token, args.country)
+        list_bank(token, args.country, args.refresh)
     elif args.mode == "create_link":
         create_link(token, args.reference, args.bank)
     elif args.mode == "list_accounts":
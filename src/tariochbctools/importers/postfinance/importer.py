@@ -1,4 +1,5 @@
 import csv
+import itertools
 import logging
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -20,31 +21,89 @@ class Importer(IdentifyMixin, ImporterProtocol):
         return self.account
 
     def extract(self, file, existing_entries):
-        csvfile = open(file=file.name, encoding="windows_1252")
-        reader = csv.reader(csvfile, delimiter=";")
         meta = data.new_metadata(file.name, 0)
+
+        # the export is ordered by date, so it is emitted one day at a time
         entries = []
+        direction = 0
+        ordered = True
+        last_date = None
+        first_day = None
+        with open(file=file.name, encoding="windows_1252") as csvfile:
+            rows = filter(None, map(self.parse_row, csv.reader(csvfile, delimiter=";")))
+            for book_date, day_rows in itertools.groupby(rows, key=lambda row: row[0]):
+                day = self.process_day(meta, book_date, day_rows)
+                if last_date is not None:
+                    step = 1 if book_date > last_date else -1
+                    if direction == 0:
+                        direction = step
+                        self.emit_day(entries, meta, first_day, direction)
+                    elif step != direction:
+                        ordered = False
+                last_date = book_date
 
-        for row in reader:
-            try:
-                book_date, text, credit, debit, val_date, balance = tuple(row)
-                book_date = datetime.strptime(book_date, "%Y-%m-%d").date()
-                if credit:
-                    amount = data.Amount(Decimal(credit), self.currency)
-                elif debit:
-                    amount = data.Amount(Decimal(debit), self.currency)
-                else:
-                    amount = None
-                if balance:
-                    balance = data.Amount(Decimal(balance), self.currency)
+                # the first day waits until the order of the export is known
+                if direction == 0:
+                    first_day = day
                 else:
-                    balance = None
-            except Exception as e:
-                logging.debug(e)
+                    self.emit_day(entries, meta, day, direction)
+
+        if direction == 0 and first_day:
+            self.emit_day(entries, meta, first_day, direction)
+        if direction < 0:
+            entries.reverse()
+        if not ordered:
+            entries = data.sorted(entries)
+        return entries
+
+    def emit_day(self, entries, meta, day, direction):
+        """Append the transactions of a day and the balance on the next SOM.
+
+        The day's closing balance is on its last row in time. Days of a
+        newest first export are appended reversed, to be reversed at the end.
+        """
+        book_date, transactions, first_balance, last_balance = day
+        balance = first_balance if direction < 0 else last_balance
+        day_entries = list(transactions)
+        # only add balance on SOM
+        book_date = book_date + timedelta(days=1)
+        if balance and book_date.day == 1:
+            day_entries.append(
+                data.Balance(meta, book_date, self.account, balance, None, None)
+            )
+        if direction < 0:
+            day_entries.reverse()
+        entries.extend(day_entries)
+
+    def parse_row(self, row):
+        try:
+            book_date, text, credit, debit, val_date, balance = tuple(row)
+            book_date = datetime.strptime(book_date, "%Y-%m-%d").date()
+            if credit:
+                amount = data.Amount(Decimal(credit), self.currency)
+            elif debit:
+                amount = data.Amount(Decimal(debit), self.currency)
+            else:
+                amount = None
+            if balance:
+                balance = data.Amount(Decimal(balance), self.currency)
             else:
-                logging.debug((book_date, text, amount, val_date, balance))
-                posting = data.Posting(self.account, amount, None, None, None, None)
-                entry = data.Transaction(
+                balance = None
+        except Exception as e:
+            logging.debug(e)
+            return None
+
+        logging.debug((book_date, text, amount, val_date, balance))
+        return book_date, text, amount, balance
+
+    def process_day(self, meta, book_date, rows):
+        transactions = []
+        first_balance = None
+        last_balance = None
+        for _, text, amount, balance in rows:
+            posting = data.Posting(self.account, amount, None, None, None, None)
+            transactions.append(
+                data.Transaction(
                     meta,
                     book_date,
                     "*",
@@ -54,15 +113,9 @@ class Importer(IdentifyMixin, ImporterProtocol):
                     data.EMPTY_SET,
                     [posting],
                 )
-                entries.append(entry)
-                # only add balance on SOM
-                book_date = book_date + timedelta(days=1)
-                if balance and book_date.day == 1:
-                    entry = data.Balance(
-                        meta, book_date, self.account, balance, None, None
-                    )
-                    entries.append(entry)
+            )
+            if balance:
+                first_balance = first_balance or balance
+                last_balance = balance
 
-        csvfile.close()
-        entries = data.sorted(entries)
-        return entries
+        return book_date, transactions, first_balance, last_balance
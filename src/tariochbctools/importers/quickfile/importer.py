@@ -1,9 +1,10 @@
 import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from hashlib import md5
 from os import path
-from typing import Dict, List, NamedTuple
+from typing import Dict, Iterator, List, NamedTuple
 
 import requests
 import yaml
@@ -12,6 +13,12 @@ from beancount.core.number import D
 from beancount.ingest import importer
 from undictify import type_checked_constructor
 
+from tariochbctools.importers.general.dedupIndex import dedup_index
+from tariochbctools.importers.general.httpSession import get_session
+
+# Pages of a bank search which are fetched at the same time
+MAX_WORKERS = 4
+
 
 @type_checked_constructor(skip=True, convert=True)
 class QuickFileTransaction(NamedTuple):
@@ -75,16 +82,58 @@ class QuickFileBankSearch(NamedTuple):
     Transactions: Dict[str, List[QuickFileTransaction]]
 
 
+def decode_bank_search(body) -> QuickFileBankSearch:
+    """Build a QuickFileBankSearch from the known response schema.
+
+    Gives the same records as ``QuickFileBankSearch(**body)`` without
+    inspecting the types of every transaction, values are converted as the
+    type checked constructors do.
+    """
+    meta = body["MetaData"]
+    metadata = QuickFileResponseMetaData._make(
+        (
+            int(meta["RecordsetCount"]),
+            int(meta["ReturnCount"]),
+            str(meta["BankName"]),
+            str(meta["BankType"]),
+            str(meta["AccountNo"]),
+            str(meta["SortCode"]),
+            str(meta["Currency"]),
+            str(meta["CurrentBalance"]),
+        )
+    )
+
+    make = QuickFileTransaction._make
+    transactions = {
+        key: [
+            make(
+                (
+                    str(trx["TransactionDate"]),
+                    str(trx["Reference"]),
+                    str(trx["Amount"]),
+                    str(trx["TagStatus"]),
+                    str(trx["TransactionId"]),
+                )
+            )
+            for trx in values
+        ]
+        for key, values in body["Transactions"].items()
+    }
+    return QuickFileBankSearch._make((metadata, transactions))
+
+
 class QuickFile:
     """Encapsulate QuickFile API protocol and data types"""
 
     DOMAIN = "quickfile.co.uk"
     API_VERSION_SLUG = "1_2"
 
-    def __init__(self, account_number, api_key, app_id):
+    def __init__(self, account_number, api_key, app_id, validate=False):
         self.account_number = account_number
         self.api_key = api_key
         self.app_id = app_id
+        # check the responses against the types of the records
+        self.validate = validate
         self._update_submission_number()
 
     @staticmethod
@@ -116,7 +165,7 @@ class QuickFile:
         header = self.request_header()
         post_data = {"payload": {"Header": header, "Body": endpoint_data}}
 
-        r = requests.post(
+        r = get_session().post(
             f"https://api.{self.DOMAIN}/{self.API_VERSION_SLUG}/{endpoint}",
             json=post_data,
         )
@@ -132,12 +181,12 @@ class QuickFile:
         return r.json()
 
     def bank_search(
-        self, account_number, transaction_count, from_date=None, to_date=None
+        self, account_number, transaction_count, from_date=None, to_date=None, offset=0
     ):
         endpoint_data = {
             "SearchParameters": {
                 "ReturnCount": str(transaction_count),
-                "Offset": "0",
+                "Offset": str(offset),
                 "OrderResultsBy": "TransactionDate",
                 "OrderDirection": "DESC",
                 "NominalCode": str(account_number),
@@ -149,7 +198,41 @@ class QuickFile:
             endpoint_data["SearchParameters"]["ToDate"] = str(to_date)
         response = self._post("bank/search", endpoint_data)
         body = response["Bank_Search"]["Body"]
-        return QuickFileBankSearch(**body)
+        if self.validate:
+            return QuickFileBankSearch(**body)
+        return decode_bank_search(body)
+
+    def bank_search_pages(
+        self,
+        account_number,
+        page_size,
+        from_date=None,
+        to_date=None,
+        max_workers=MAX_WORKERS,
+    ) -> Iterator[QuickFileBankSearch]:
+        """All pages of a bank search, in order.
+
+        The first page tells the number of transactions, the remaining pages
+        are then fetched concurrently.
+        """
+        first = self.bank_search(account_number, page_size, from_date, to_date)
+        yield first
+
+        offsets = range(page_size, first.MetaData.RecordsetCount, page_size)
+        if not offsets:
+            return
+
+        def fetch(offset):
+            # every request needs its own submission number
+            client = QuickFile(
+                self.account_number, self.api_key, self.app_id, self.validate
+            )
+            return client.bank_search(
+                account_number, page_size, from_date, to_date, offset
+            )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            yield from pool.map(fetch, offsets)
 
 
 class Importer(importer.ImporterProtocol):
@@ -167,6 +250,7 @@ class Importer(importer.ImporterProtocol):
                 account_number=self.config["account_number"],
                 api_key=self.config["api_key"],
                 app_id=self.config["app_id"],
+                validate=self.config.get("validate", False),
             )
         self.existing_entries = existing_entries
 
@@ -178,11 +262,13 @@ class Importer(importer.ImporterProtocol):
 
     def extract(self, file, existing_entries=None):
         self._configure(file, existing_entries)
+        dedup = dedup_index(existing_entries)
         entries = []
 
         for bank_account in self.config["accounts"].keys():
             entries.extend(self._extract_bank_transactions(bank_account))
 
+        dedup.mark_all(entries, "quickfile_id")
         return entries
 
     def _extract_bank_transactions(self, bank_account, invert_sign=False):
@@ -190,19 +276,38 @@ class Importer(importer.ImporterProtocol):
         transaction_count = self.config["transaction_count"]  # [0..200]
         from_date = self.config.get("from_date", None)
         to_date = self.config.get("to_date", None)
-        response = self.quickfile.bank_search(
-            bank_account, transaction_count, from_date, to_date
-        )
-        metadata = response.MetaData
-        transactions = response.Transactions["Transaction"]
         local_account = self.config["accounts"].get(bank_account)
 
-        for trx in transactions:
-            entries.extend(
-                self._extract_transaction(
-                    trx, local_account, metadata, transactions, invert_sign
-                )
+        # all transactions of a date range, else only the most recent ones
+        if from_date:
+            pages = self.quickfile.bank_search_pages(
+                bank_account, transaction_count, from_date, to_date
             )
+        else:
+            pages = [
+                self.quickfile.bank_search(
+                    bank_account, transaction_count, from_date, to_date
+                )
+            ]
+
+        for response in pages:
+            metadata = response.MetaData
+            transactions = response.Transactions["Transaction"]
+            if not from_date and metadata.RecordsetCount > len(transactions):
+                logging.warning(
+                    "Only the last %d of %d transactions of %s imported, "
+                    "set from_date to import all of them",
+                    len(transactions),
+                    metadata.RecordsetCount,
+                    bank_account,
+                )
+
+            for trx in transactions:
+                entries.extend(
+                    self._extract_transaction(
+                        trx, local_account, metadata, transactions, invert_sign
+                    )
+                )
 
         return entries
 
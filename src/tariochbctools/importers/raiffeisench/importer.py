@@ -1,5 +1,3 @@
-import re
-
 from tariochbctools.importers.general import mt940importer
 
 
@@ -8,23 +6,13 @@ class RaiffeisenCHImporter(mt940importer.Importer):
 
     """To get the correct file, choose SWIFT -> 'Période prédéfinie du relevé de compte' -> Sans détails"""
 
+    transaction_details_rules = mt940importer.RewriteRules([(r"\n", ", ")])
+
     def prepare_payee(self, trxdata):
         return ""
 
     def prepare_narration(self, trxdata):
-        extra = trxdata["extra_details"]
-        details = trxdata["transaction_details"]
-
-        extraReplacements = {}
-
-        detailsReplacements = {}
-        detailsReplacements[r"\n"] = ", "
-
-        for pattern, replacement in extraReplacements.items():
-            extra = re.sub(pattern, replacement, extra)
-
-        for pattern, replacement in detailsReplacements.items():
-            details = re.sub(pattern, replacement, details)
+        extra, details = self.rewrite_details(trxdata)
 
         if extra:
             narration = extra.strip() + ": " + details.strip()
@@ -1,9 +1,7 @@
-import itertools
 import re
 from datetime import datetime, timedelta
 from unicodedata import normalize
 
-import camelot
 from dateutil.parser import parse
 from pandas import concat
 from beancount.core import amount, data
@@ -11,58 +9,79 @@ from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
 from pathlib import Path
-from typing import List, Union
+from typing import Iterator, List, Optional, Union
 import csv
 # import matplotlib
 
+from tariochbctools.importers.general.pdfPages import iter_page_tables
+from tariochbctools.importers.general.pdfReport import PageReport, ParseReport
+
 
 def cleanDecimal(formatted_number):
     return D(formatted_number.replace(",", ""))
 
 
-def parse_pdf(pdf_file_name: str) -> List[List[Union[datetime.date, D, str]]]:
-    # Parse PDF file
+def parse_pdf(pdf_file_name: str, report: Optional[ParseReport] = None) -> Iterator[List[Union[datetime.date, D, str]]]:
+    """Yield the transactions of a statement, reading the PDF page by page.
+
+    A transaction is only yielded once the next one starts, as its
+    description may continue on the following lines or even the next page.
+    """
     columns = ['120,287,340,430,500']
-    table1 = camelot.read_pdf(
+    pages = iter_page_tables(
         pdf_file_name,
-        pages='1',
-        flavor='stream',
-        table_areas=['55,543,550,110'],
-        columns=columns
+        first_page=dict(flavor='stream', table_areas=['55,543,550,110'], columns=columns),
+        other_pages=dict(flavor='stream', table_areas=['55,597,550,110'], columns=columns),
+        report=report,
     )
-    table2 = camelot.read_pdf(
-        pdf_file_name,
-        pages='2-end',
-        flavor='stream',
-        table_areas=['55,597,550,110'],
-        columns=columns
-    )
-    tables = [table1, table2]
-
-    # Loop over pages filling a list with transactions
-    transactions = []
-    for table in itertools.chain(*tables):
-        # Plot for debugging, requires matplotlib
-        # camelot.plot(table, kind='contour').show()
 
-        # Loop over rows
-        for index, row in table.df.iterrows():
-            date, desc, card, debit, credit, balance = tuple(row)
-
-            # Transaction date
-            try:
-                date = datetime.strptime(date, "%d.%m.%Y").date()
-            except Exception:
-                # A description spans over two lines?
-                if not date and not card and not debit and not credit and not balance:
-                    transactions[-1][2] += ' ' + normalize("NFKD", desc)
-                continue
-
-            # Transaction amount
-            value = - cleanDecimal(debit) if debit else cleanDecimal(credit)
-            transactions.append([date, value, normalize("NFKD", desc)])
-
-    return transactions
+    pending = None
+    last_balance = None
+    for page, tables in pages:
+        page_report = report.page(page) if report else PageReport(page)
+
+        for table_index, table in enumerate(tables):
+            # Plot for debugging, requires matplotlib
+            # camelot.plot(table, kind='contour').show()
+
+            # Loop over rows
+            for index, row in table.df.iterrows():
+                date, desc, card, debit, credit, balance = tuple(row)
+
+                # Transaction date
+                try:
+                    date = datetime.strptime(date, "%d.%m.%Y").date()
+                except Exception:
+                    # A description spans over two lines?
+                    if pending and not date and not card and not debit and not credit and not balance:
+                        pending[2] += ' ' + normalize("NFKD", desc)
+                    else:
+                        page_report.reject(table_index, index, "no date: {}".format(date))
+                    continue
+
+                if pending:
+                    yield pending
+
+                # Transaction amount
+                value = - cleanDecimal(debit) if debit else cleanDecimal(credit)
+                pending = [date, value, normalize("NFKD", desc)]
+                page_report.accept()
+
+                # Running balance, only checked if it can be read
+                try:
+                    balance = cleanDecimal(balance) if balance else None
+                except Exception:
+                    balance = None
+                if balance is None:
+                    if last_balance is not None:
+                        last_balance += value
+                    continue
+                if last_balance is not None:
+                    page_report.check_balance(table_index, index, last_balance + value, balance)
+                last_balance = balance
+
+    if pending:
+        yield pending
 
 
 class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
@@ -72,17 +91,17 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
         identifier.IdentifyMixin.__init__(self, matchers=[("filename", regexps)])
         self.account = account
         self.currency = "CHF"
+        self.report = None
 
     def file_account(self, file):
         return self.account
 
     def extract(self, file, existing_entries=None):
         entries = []
+        self.report = ParseReport(file.name)
 
         # Parse the PDF
-        transactions = parse_pdf(file.name)
-
-        for transaction in transactions:
+        for transaction in parse_pdf(file.name, self.report):
             entries.append(data.Transaction(
                 data.new_metadata(file.name, 0),
                 transaction[0],
@@ -94,4 +113,5 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
                 [data.Posting(self.account, amount.Amount(D(transaction[1]), self.currency), None, None, None, None)],
             ))
 
+        self.report.log()
         return entries
@@ -1,5 +1,3 @@
-import csv
-import logging
 from datetime import timedelta
 from io import StringIO
 
@@ -7,7 +5,33 @@ from beancount.core import amount, data
 from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
-from dateutil.parser import parse
+
+from tariochbctools.importers.general import csvColumns
+
+FIELDNAMES = [
+    "Type",
+    "Product",
+    "Started Date",
+    "Completed Date",
+    "Description",
+    "Amount",
+    "Fee",
+    "Currency",
+    "State",
+    "Balance",
+]
+
+SCHEMA = {
+    "Started Date": csvColumns.DATE,
+    "Completed Date": csvColumns.OPTIONAL_DATE,
+    "Type": csvColumns.TEXT,
+    "Description": csvColumns.TEXT,
+    "Amount": csvColumns.DECIMAL,
+    "Fee": csvColumns.DECIMAL,
+    "Currency": csvColumns.TEXT,
+    "State": csvColumns.TEXT,
+    "Balance": csvColumns.OPTIONAL_DECIMAL,
+}
 
 
 class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
@@ -27,65 +51,76 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
 
     def extract(self, file, existing_entries=None):
         entries = []
-        has_balance = False
+        # currency -> (completed date, line, balance) of the last completed row
+        balances = {}
+        # currency -> date of its last entry
+        last_dates = {}
 
         with StringIO(file.contents()) as csvfile:
-            reader = csv.DictReader(
+            columns = csvColumns.read_columns(
                 csvfile,
-                [
-                    "Type",
-                    "Product",
-                    "Started Date",
-                    "Completed Date",
-                    "Description",
-                    "Amount",
-                    "Fee",
-                    "Currency",
-                    "State",
-                    "Balance",
-                ],
+                SCHEMA,
+                FIELDNAMES,
                 delimiter=",",
                 skipinitialspace=True,
+                errors="coerce",
             )
-            next(reader)
-            for row in reader:
-                try:
-                    meta = data.new_metadata(file.name, reader.line_num)
-                    book_date = parse(row['Started Date'].strip()).date()
-                    description = row["Type"].strip() + ' ' + row["Description"].strip()
-                    cash_flow = amount.Amount(D(row["Amount"]) - D(row["Fee"]), row["Currency"])
-                    if cash_flow[0] == D(0):
-                        continue
-
-                    if row['State'].strip() != 'COMPLETED':
-                        continue
-
-                    # Process entry
-                    entry = data.Transaction(
-                        meta,
-                        book_date,
-                        "*",
-                        "",
-                        description,
-                        data.EMPTY_SET,
-                        data.EMPTY_SET,
-                        [data.Posting(self.account, cash_flow, None, None, None, None)],
-                    )
-                    entries.append(entry)
-
-                    # Update balance
-                    balance = data.Balance(
-                        meta,
-                        book_date + timedelta(days=1),
-                        self.account,
-                        amount.Amount(D(row["Balance"]), self.currency),
-                        None,
-                        None
-                    )
-
-                except Exception as e:
-                    logging.warning(e)
-                    continue
-        # Append balance
-        # entries.append(balance)
+
+        rows = zip(
+            columns["Started Date"],
+            columns["Completed Date"],
+            columns["Type"],
+            columns["Description"],
+            columns["Amount"],
+            columns["Fee"],
+            columns["Currency"],
+            columns["State"],
+            columns["Balance"],
+        )
+        for line, (book_date, completed_date, trx_type, description, amt, fee, currency, state, balance) in enumerate(rows, 2):
+            # invalid cells have been logged
+            if book_date is None or amt is None or fee is None:
+                continue
+
+            if state != 'COMPLETED':
+                continue
+
+            # Update balance, the Balance column follows the completion order
+            completed_date = completed_date or book_date
+            if balance is not None and (currency not in balances or balances[currency][0] <= completed_date):
+                balances[currency] = (completed_date, line, balance)
+
+            meta = data.new_metadata(file.name, line)
+            description = trx_type + ' ' + description
+            cash_flow = amount.Amount(amt - fee, currency)
+            if cash_flow[0] == D(0):
+                continue
+
+            # Process entry
+            entry = data.Transaction(
+                meta,
+                book_date,
+                "*",
+                "",
+                description,
+                data.EMPTY_SET,
+                data.EMPTY_SET,
+                [data.Posting(self.account, cash_flow, None, None, None, None)],
+            )
+            entries.append(entry)
+            last_dates[currency] = max(book_date, last_dates.get(currency, book_date))
+
+        # Append one balance per currency, after the day of its last completion
+        # and of its last entry
+        for currency, (completed_date, line, balance) in balances.items():
+            balance_date = max(completed_date, last_dates.get(currency, completed_date))
+            entries.append(data.Balance(
+                data.new_metadata(file.name, line),
+                balance_date + timedelta(days=1),
+                self.account,
+                amount.Amount(balance, currency),
+                None,
+                None
+            ))
+
         return entries
@@ -11,6 +11,8 @@ from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
 
+from tariochbctools.importers.general.dedupIndex import dedup_index
+
 
 def parse_pdf_to_csv(pdf_file_name, csv_file_name, owner: str):
     # get number of pages
@@ -163,7 +165,7 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
             rows = list(reader)
 
         # Transactions
-        return [
+        entries = [
             data.Transaction(
                 data.new_metadata(
                     filename=file.name,
@@ -184,3 +186,5 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
             )
             for line_number, row in enumerate(rows[1:])
         ]
+        dedup_index(existing_entries).mark_all(entries, 'orderno', self.account)
+        return entries
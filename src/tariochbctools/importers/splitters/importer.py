@@ -7,7 +7,9 @@ from beancount.core import amount, data
 from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
-from dateutil.parser import parse
+
+from tariochbctools.importers.general import csvColumns
+from tariochbctools.importers.general.watermark import Watermark, watermark_key
 
 
 def clean_decimal(formatted_number):
@@ -17,9 +19,18 @@ def clean_decimal(formatted_number):
 class SplitserImporter(identifier.IdentifyMixin, importer.ImporterProtocol):
     """An importer for custom Splitser CSV files."""
 
-    def __init__(self, regexps, account):
+    SCHEMA = {
+        'Date': csvColumns.DATE,
+        'Payee': csvColumns.TEXT,
+        'Concept': csvColumns.TEXT,
+        'Value': csvColumns.DECIMAL,
+        'Currency': csvColumns.TEXT,
+    }
+
+    def __init__(self, regexps, account, incremental=False):
         identifier.IdentifyMixin.__init__(self, matchers=[("filename", regexps)])
         self.account = account
+        self.incremental = incremental
 
     def name(self):
         return super().name() + self.account
@@ -30,48 +41,56 @@ class SplitserImporter(identifier.IdentifyMixin, importer.ImporterProtocol):
     def extract(self, file, existing_entries=None):
         entries = []
 
-        with StringIO(file.contents()) as csvfile:
-            reader = csv.DictReader(
+        # New expenses are appended at the end of the export
+        if self.incremental:
+            watermark = Watermark(watermark_key(self.name(), self.account, file.name))
+            content = watermark.read(file.name)
+        else:
+            watermark = None
+            content = file.contents()
+
+        with StringIO(content) as csvfile:
+            columns = csvColumns.read_columns(
                 csvfile,
+                self.SCHEMA,
                 delimiter=";",
                 skipinitialspace=True,
+                errors="coerce",
             )
-            for row in reader:
-                try:
-                    # Parse dictionary
-                    meta = data.new_metadata(file.name, reader.line_num)
-                    book_date = parse(row['Date'].strip()).date()
-                    payee = row["Payee"].strip()
-                    description = row["Concept"].strip()
-                    cash_flow = amount.Amount(D(row["Value"]), row["Currency"].strip())
-
-                    # Process entry
-                    entries.append(data.Transaction(
-                        meta,
-                        book_date,
-                        "*",
-                        payee,
-                        description,
-                        data.EMPTY_SET,
-                        data.EMPTY_SET,
-                        [data.Posting(self.account, cash_flow, None, None, None, None)],
-                    ))
-
-                    # Settlement?
-                    if description == 'Settle':
-                        entries.append(data.Balance(
-                            data.new_metadata(file.name, 0),
-                            book_date + timedelta(days=1),
-                            self.account,
-                            amount.Amount(D(0), row["Currency"].strip()),
-                            None,
-                            None
-                        ))
 
+        rows = zip(columns['Date'], columns["Payee"], columns["Concept"], columns["Value"], columns["Currency"])
+        for line, (book_date, payee, description, value, currency) in enumerate(rows, 2):
+            # invalid cells have been logged
+            if book_date is None or value is None:
+                continue
 
-                except Exception as e:
-                    logging.warning(e)
+            # Process entry
+            meta = data.new_metadata(file.name, line)
+            cash_flow = amount.Amount(value, currency)
+            entries.append(data.Transaction(
+                meta,
+                book_date,
+                "*",
+                payee,
+                description,
+                data.EMPTY_SET,
+                data.EMPTY_SET,
+                [data.Posting(self.account, cash_flow, None, None, None, None)],
+            ))
+
+            # Settlement?
+            if description == 'Settle':
+                entries.append(data.Balance(
+                    data.new_metadata(file.name, 0),
+                    book_date + timedelta(days=1),
+                    self.account,
+                    amount.Amount(D(0), currency),
+                    None,
+                    None
+                ))
 
+        if watermark:
+            watermark.stage(max(filter(None, columns['Date']), default=None))
         return entries
 
 
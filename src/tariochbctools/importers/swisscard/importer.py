@@ -12,88 +12,131 @@ from beancount.ingest.importers.mixins import identifier
 from pathlib import Path
 import csv
 
+from tariochbctools.importers.general.dateParser import DateParser
+from tariochbctools.importers.general.pdfBatch import PdfBatchMixin
+from tariochbctools.importers.general.pdfTables import postprocess_table
 
-def get_statement_summary(file_name):
-    # Statement date
-    header = camelot.read_pdf(
-        file_name,
-        pages='1',
-        flavor='stream',
-        table_areas=['60,710,270,620']
-    )
-    date = None
-    for index, row in header[0].df.iterrows():
+
+DEFAULT_LAYOUT = {
+    # Header areas from top to bottom: statement date, then balance summary
+    "header_areas": ['60,710,270,620', '50,480,560,462'],
+    "first_page_area": '50,380,560,50',
+    "other_pages_area": '50,800,560,50',
+    "columns": '120,530',
+    "body_pages": '2-end',
+}
+
+def parse_statement_date(df):
+    for index, row in df.iterrows():
         try:
             # Parse the header
             if "Statement date" in row[0]:
-                date = parse(row[1].strip(), dayfirst=True).date()
-                break
+                return parse(row[1].strip(), dayfirst=True).date()
         except ValueError:
             pass
-    else:
-        raise ValueError
 
-    # Balance
-    table = camelot.read_pdf(
-        file_name,
-        pages='1',
-        flavor='stream',
-        table_areas=['50,480,560,462']
-    )
-    for index, row in table[0].df.iterrows():
+    raise ValueError
+
+
+def parse_statement_balance(df):
+    for index, row in df.iterrows():
         try:
             # Parse the line
             your_payment = D(row[1].replace("'", "").replace("CHF", ""))
             total_transactions = D(row[2].replace("'", "").replace("CHF", ""))
             new_balance = D(row[3].replace("'", "").replace("CHF", ""))
-            return date, your_payment, total_transactions, new_balance
+            return your_payment, total_transactions, new_balance
         except ValueError:
             pass
 
     raise ValueError
 
 
+def get_statement_summary(file_name, layout=DEFAULT_LAYOUT):
+    date_area, balance_area = layout["header_areas"]
+
+    # Statement date
+    header = camelot.read_pdf(
+        file_name,
+        pages='1',
+        flavor='stream',
+        table_areas=[date_area]
+    )
+    date = parse_statement_date(header[0].df)
+
+    # Balance
+    table = camelot.read_pdf(
+        file_name,
+        pages='1',
+        flavor='stream',
+        table_areas=[balance_area]
+    )
+    return (date,) + parse_statement_balance(table[0].df)
+
+
+def read_first_page(file_name, layout):
+    """Read header and first page transactions of a known layout in a single pass."""
+    # camelot returns the tables ordered from top to bottom of the page
+    tables = camelot.read_pdf(
+        file_name,
+        pages='1',
+        flavor='stream',
+        table_areas=layout["header_areas"] + [layout["first_page_area"]],
+        columns=['', '', layout["columns"]]
+    )
+    date = parse_statement_date(tables[0].df)
+    summary = (date,) + parse_statement_balance(tables[1].df)
+    return summary, tables[2].df
+
+
 def parse_pdf_to_csv(pdf_file_name: str, csv_file_name: str):
-    # Parse header
-    statement_date, your_payment, total_transactions, new_balance = get_statement_summary(pdf_file_name)
+    # Parse header and first page in one pass, separately if that fails
+    layout = DEFAULT_LAYOUT
+    try:
+        summary, first_page = read_first_page(pdf_file_name, layout)
+    except (ValueError, IndexError):
+        summary = get_statement_summary(pdf_file_name, layout)
+        table1 = camelot.read_pdf(
+            pdf_file_name,
+            pages='1',
+            flavor='stream',
+            table_areas=[layout["first_page_area"]],
+            columns=[layout["columns"]]
+        )
+        first_page = table1[0].df
+
+    statement_date, your_payment, total_transactions, new_balance = summary
 
     # Parse entries
     accumulated_cashflow = D(0)
     payments = D(0)
     entries = []
-    table1 = camelot.read_pdf(
-        pdf_file_name,
-        pages='1',
-        flavor='stream',
-        table_areas=['50,380,560,50'],
-        columns=['120,530']
-    )
     table2 = camelot.read_pdf(
         pdf_file_name,
-        pages='2-end',
+        pages=layout["body_pages"],
         flavor='stream',
-        table_areas=['50,800,560,50'],
-        columns=['120,530']
+        table_areas=[layout["other_pages_area"]],
+        columns=[layout["columns"]]
     )
 
-    df = concat([table1[0].df, table2[0].df])
+    rows, _ = postprocess_table(
+        concat([first_page, table2[0].df]),
+        ["date", "description", "amount"],
+        date="date",
+        amounts=["amount"],
+        text="description",
+        ascii_text=True,
+    )
 
     # Transactions
-    for index, row in df.iterrows():
-        try:
-            # Parse row
-            date = parse(row[0].strip(), dayfirst=True).date()
-            desc = unidecode.unidecode(row[1].replace("\n", " "))
-            cash_flow = -D(row[2].replace("'", ""))
-            if "YOUR PAYMENT" in desc:
-                cash_flow = -cash_flow
-                payments = payments + cash_flow
-            else:
-                accumulated_cashflow = accumulated_cashflow - cash_flow
-            entries.append([date, desc, cash_flow])
-
-        except ValueError:
-            pass
+    for date, desc, value in zip(rows["date"], rows["description"], rows["amount"]):
+        cash_flow = -value
+        if "YOUR PAYMENT" in desc:
+            cash_flow = -cash_flow
+            payments = payments + cash_flow
+        else:
+            accumulated_cashflow = accumulated_cashflow - cash_flow
+        entries.append([date, desc, cash_flow])
 
     assert (payments == your_payment)
     assert (accumulated_cashflow == total_transactions)
@@ -111,9 +154,11 @@ def parse_pdf_to_csv(pdf_file_name: str, csv_file_name: str):
             f.write('{};{};{}\n'.format(*entry))
 
 
-class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
+class Importer(PdfBatchMixin, identifier.IdentifyMixin, importer.ImporterProtocol):
     """An importer for Cembra Card Statement PDF files."""
 
+    pdf_to_csv = staticmethod(parse_pdf_to_csv)
+
     def __init__(self, regexps, account):
         identifier.IdentifyMixin.__init__(self, matchers=[("filename", regexps)])
         self.account = account
@@ -139,9 +184,10 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
             rows = list(reader)
 
         # Balance
+        parse_date = DateParser()
         entries.append(data.Balance(
             data.new_metadata(file.name, 0),
-            parse(rows[1][0].strip(), dayfirst=False).date(),
+            parse_date(rows[1][0]),
             self.account,
             amount.Amount(-D(rows[1][2]), self.currency),
             None,
@@ -150,7 +196,7 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
 
         # Transactions
         for row in rows[2:]:
-            date = parse(row[0].strip(), dayfirst=False).date()
+            date = parse_date(row[0])
             desc = unidecode.unidecode(row[1].replace("\n", " "))
             cash_flow = D(row[2].replace("'", ""))
             meta = data.new_metadata(file.name, 0)
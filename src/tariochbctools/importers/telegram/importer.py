@@ -1,20 +1,33 @@
-import csv
+from io import StringIO
 from typing import Any
 
 from beancount.core import amount, data
-from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
-from dateutil.parser import parse
+
+from tariochbctools.importers.general import csvColumns
+from tariochbctools.importers.general.watermark import Watermark, watermark_key
+
+FIELDNAMES = ['id', 'sender', 'message_date', 'transaction_date', 'account', 'payee', 'description', 'amount', 'currency', 'tag']
+
+SCHEMA = {
+    'transaction_date': csvColumns.DATE,
+    'amount': csvColumns.DECIMAL,
+    'currency': csvColumns.TEXT,
+    'description': csvColumns.TEXT,
+    'payee': csvColumns.TEXT,
+    'tag': csvColumns.TEXT,
+}
 
 
 class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
     """An importer for Telegram downloader."""
 
-    def __init__(self, regexps, account, map={}):
+    def __init__(self, regexps, account, map={}, incremental=False):
         identifier.IdentifyMixin.__init__(self, matchers=[("filename", regexps)])
         self.account = account
         self.map = map
+        self.incremental = incremental
 
     def name(self):
         return super().name() + self.account
@@ -27,23 +40,34 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
             existing_entries: Any) -> list:
         entries = []
 
-        with open(file.name, 'r', encoding='utf8') as csvfile:
-            reader = csv.DictReader(
-                csvfile,
-                ['id', 'sender', 'message_date', 'transaction_date', 'account', 'payee', 'description', 'amount', 'currency', 'tag'],
-                delimiter=";"
-            )
-            rows = list(reader)[1:]
+        # New messages are added at the top of the export
+        if self.incremental:
+            watermark = Watermark(watermark_key(self.name(), self.account, file.name), newest_first=True)
+            csvfile = StringIO(watermark.read(file.name))
+        else:
+            watermark = None
+            csvfile = open(file.name, 'r', encoding='utf8')
+
+        with csvfile:
+            try:
+                columns = csvColumns.read_columns(csvfile, SCHEMA, FIELDNAMES, delimiter=";")
+            except ValueError as e:
+                raise Warning('Error parsing file {}\n{}'.format(file.name, e))
 
-        for index, row in enumerate(reversed(rows)):
+        rows = zip(
+            columns['transaction_date'],
+            columns['amount'],
+            columns['currency'],
+            columns['description'],
+            columns['payee'],
+            columns['tag'],
+        )
+        for index, row in enumerate(reversed(list(rows))):
             try:
                 # Parse entry
+                book_date, amt, currency, note, payee, tag = row
                 meta = data.new_metadata(file.name, index)
-                book_date = parse(row['transaction_date'].strip()).date()
-                amt = amount.Amount(D(row["amount"]), row["currency"])
-                note = row["description"].strip()
-                payee = row["payee"].strip()
-                tag = row["tag"].strip()
+                amt = amount.Amount(amt, currency)
                 if tag == '':
                     tag = data.EMPTY_SET
                 else:
@@ -76,4 +100,6 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
             except BaseException as e:
                 raise Warning('Error parsing line {}\n{}'.format(row, e))
 
+        if watermark:
+            watermark.stage(max(columns['transaction_date'], default=None))
         return entries
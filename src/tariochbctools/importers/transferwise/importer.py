@@ -1,20 +1,46 @@
 import base64
-import json
-from datetime import date, datetime, timezone
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 from os import path
-from urllib.parse import urlencode
 
 import dateutil.parser
-import requests
 import rsa
-import urllib3
 import yaml
 from beancount.core import amount, data
 from beancount.core.number import D
 from beancount.ingest import importer
 from dateutil.relativedelta import relativedelta
 
-http = urllib3.PoolManager()
+from tariochbctools.importers.general.httpSession import get_session
+
+# Longest interval of a statement request
+MAX_INTERVAL = timedelta(days=365)
+
+# Statements which are fetched at the same time
+MAX_WORKERS = 4
+
+
+def split_interval(start, end, max_interval=MAX_INTERVAL):
+    """Split the ISO timestamps ``start`` to ``end`` into consecutive intervals."""
+    chunkStart = dateutil.parser.isoparse(start)
+    intervalEnd = dateutil.parser.isoparse(end)
+    intervals = []
+    while True:
+        chunkEnd = min(chunkStart + max_interval, intervalEnd)
+        intervals.append((chunkStart.isoformat(), chunkEnd.isoformat()))
+        if chunkEnd >= intervalEnd:
+            return intervals
+        chunkStart = chunkEnd
+
+
+def _line_key(transaction):
+    return (
+        transaction["referenceNumber"],
+        transaction["date"],
+        transaction["amount"]["value"],
+        transaction["details"].get("type"),
+    )
 
 
 class Importer(importer.ImporterProtocol):
@@ -31,8 +57,7 @@ class Importer(importer.ImporterProtocol):
         return "web"
 
     def __init__(self, *args, **kwargs):
-        if "profileId" in kwargs:
-            self.profileId = kwargs.pop("profileId")
+        self.profileId = kwargs.pop("profileId", None)
         if "startDate" in kwargs:
             self.startDate = kwargs.pop("startDate")
         else:
@@ -47,6 +72,12 @@ class Importer(importer.ImporterProtocol):
             self.endDate = datetime.combine(
                 date.today(), datetime.max.time(), timezone.utc
             ).isoformat()
+        self.session = get_session()
+        self.private_key_path = None
+        self.private_key = None
+        self.one_time_token = None
+        self.signature = None
+        self._sca_lock = threading.Lock()
         super().__init__(*args, **kwargs)
 
     # Based on the Transferwise official example provided under the
@@ -56,15 +87,15 @@ class Importer(importer.ImporterProtocol):
         currency,
         base_url,
         statement_type="FLAT",
+        interval=None,
     ):
-        params = urlencode(
-            {
-                "currency": currency,
-                "type": statement_type,
-                "intervalStart": self.startDate,
-                "intervalEnd": self.endDate,
-            }
-        )
+        intervalStart, intervalEnd = interval or (self.startDate, self.endDate)
+        params = {
+            "currency": currency,
+            "type": statement_type,
+            "intervalStart": intervalStart,
+            "intervalEnd": intervalEnd,
+        }
 
         url = (
             base_url
@@ -72,8 +103,7 @@ class Importer(importer.ImporterProtocol):
             + str(self.profileId)
             + "/borderless-accounts/"
             + str(self.accountId)
-            + "/statement.json?"
-            + params
+            + "/statement.json"
         )
 
         headers = {
@@ -81,31 +111,43 @@ class Importer(importer.ImporterProtocol):
             "User-Agent": "tw-statements-sca",
             "Content-Type": "application/json",
         }
-        if hasattr(self, "one_time_token"):
-            headers["x-2fa-approval"] = self.one_time_token
-            headers["X-Signature"] = self.signature
+        with self._sca_lock:
+            one_time_token = self.one_time_token
+            if one_time_token is not None:
+                headers["x-2fa-approval"] = one_time_token
+                headers["X-Signature"] = self.signature
 
-        r = http.request("GET", url, headers=headers, retries=False)
+        r = self.session.get(url, params=params, headers=headers)
 
-        if r.status == 200 or r.status == 201:
-            return json.loads(r.data)
-        elif r.status == 403 and r.getheader("x-2fa-approval") is not None:
-            self.one_time_token = r.getheader("x-2fa-approval")
-            self.signature = self._do_sca_challenge()
+        if r.status_code == 200 or r.status_code == 201:
+            return r.json()
+        elif r.status_code == 403 and r.headers.get("x-2fa-approval") is not None:
+            with self._sca_lock:
+                # concurrent requests are challenged together, sign only once
+                if self.one_time_token == one_time_token:
+                    self.one_time_token = r.headers.get("x-2fa-approval")
+                    self.signature = self._do_sca_challenge()
             return self._get_statement(
                 currency=currency,
                 base_url=base_url,
                 statement_type=statement_type,
+                interval=(intervalStart, intervalEnd),
             )
         else:
             raise Exception("Failed to get transactions.")
 
-    def _do_sca_challenge(self):
-        # Read the private key file as bytes.
-        with open(self.private_key_path, "rb") as f:
-            private_key_data = f.read()
+    def _load_private_key(self):
+        if self.private_key is None:
+            # Read the private key file as bytes.
+            with open(self.private_key_path, "rb") as f:
+                private_key_data = f.read()
 
-        private_key = rsa.PrivateKey.load_pkcs1(private_key_data, "PEM")
+            self.private_key = rsa.PrivateKey.load_pkcs1(private_key_data, "PEM")
+
+        return self.private_key
+
+    def _do_sca_challenge(self):
+        private_key = self._load_private_key()
 
         # Use the private key to sign the one-time-token that was returned
         # in the x-2fa-approval header of the HTTP 403.
@@ -119,22 +161,54 @@ class Importer(importer.ImporterProtocol):
 
         return signature
 
+    def _get_transactions(self, currencies, base_url, max_workers=MAX_WORKERS):
+        """The transactions of all intervals, concurrently for all currencies."""
+        jobs = [
+            (ccy, interval)
+            for ccy in currencies
+            for interval in split_interval(self.startDate, self.endDate)
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            statements = pool.map(
+                lambda job: self._get_statement(
+                    currency=job[0],
+                    base_url=base_url,
+                    statement_type="FLAT",
+                    interval=job[1],
+                ),
+                jobs,
+            )
+
+            transactions = {ccy: [] for ccy in currencies}
+            previous = {}
+            for (ccy, _), statement in zip(jobs, statements):
+                # a transaction at the boundary of two intervals is in both,
+                # fees are separate lines with the reference of their transfer
+                lines = [(_line_key(t), t) for t in statement["transactions"]]
+                boundary = previous.get(ccy, set())
+                transactions[ccy].extend(t for key, t in lines if key not in boundary)
+                previous[ccy] = {key for key, _ in lines}
+
+        return transactions
+
     def extract(self, file, existing_entries):
         with open(file.name, "r") as f:
             config = yaml.safe_load(f)
         self.api_token = config["token"]
         baseAccount = config["baseAccount"]
-        self.private_key_path = config["privateKeyPath"]
+        if config["privateKeyPath"] != self.private_key_path:
+            self.private_key_path = config["privateKeyPath"]
+            self.private_key = None
 
         headers = {"Authorization": "Bearer " + self.api_token}
         if not self.profileId:
-            r = requests.get(
+            r = self.session.get(
                 "https://api.transferwise.com/v1/profiles", headers=headers
             )
             profiles = r.json()
             self.profileId = profiles[0]["id"]
 
-        r = requests.get(
+        r = self.session.get(
             "https://api.transferwise.com/v1/borderless-accounts",
             params={"profileId": self.profileId},
             headers=headers,
@@ -144,19 +218,15 @@ class Importer(importer.ImporterProtocol):
 
         entries = []
         base_url = "https://api.transferwise.com"
-        for account in accounts[0]["balances"]:
-            accountCcy = account["currency"]
+        currencies = [account["currency"] for account in accounts[0]["balances"]]
+        transactions = self._get_transactions(currencies, base_url)
+        for accountCcy in currencies:
             if isinstance(baseAccount, dict):
                 account_name = baseAccount[accountCcy]
             else:
                 account_name = baseAccount + accountCcy
-            transactions = self._get_statement(
-                currency=accountCcy,
-                base_url=base_url,
-                statement_type="FLAT",
-            )
 
-            for transaction in transactions["transactions"]:
+            for transaction in transactions[accountCcy]:
                 metakv = {
                     "ref": transaction["referenceNumber"],
                 }
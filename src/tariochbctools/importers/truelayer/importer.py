@@ -1,5 +1,7 @@
 import logging
-from datetime import timedelta
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone
 from os import path
 
 import dateutil.parser
@@ -9,6 +11,10 @@ from beancount.core import amount, data
 from beancount.core.number import D
 from beancount.ingest import importer
 
+from tariochbctools.importers.general.dedupIndex import dedup_index
+from tariochbctools.importers.general.httpSession import get_session
+from tariochbctools.importers.general.stateStore import JsonStateStore
+
 # https://docs.truelayer.com/#retrieve-account-transactions
 
 TX_MANDATORY_ID_FIELDS = ("transaction_id",)
@@ -23,6 +29,12 @@ TX_OPTIONAL_META_ID_FIELDS = (
     "provider_reference",
 )
 
+# Accounts and cards whose transactions are fetched at the same time
+MAX_WORKERS = 4
+
+# Days before the last imported transaction which are requested again
+OVERLAP_DAYS = 7
+
 
 class Importer(importer.ImporterProtocol):
     """An importer for Truelayer API (e.g. for Revolut)."""
@@ -34,6 +46,16 @@ class Importer(importer.ImporterProtocol):
         self.refreshToken = None
         self.sandbox = None
         self.existing_entries = None
+        self.dedup = dedup_index(None)
+        self.balances = {}
+        self.session = get_session()
+        self.max_workers = MAX_WORKERS
+        self.overlap = timedelta(days=OVERLAP_DAYS)
+        self.imported = {}
+        self.shared = set()
+        self.state = JsonStateStore("truelayer")
+        self.incremental = False
+        self.synced = {}
         self.domain = "truelayer.com"
 
     def _configure(self, file, existing_entries):
@@ -43,7 +65,18 @@ class Importer(importer.ImporterProtocol):
         self.clientSecret = self.config["client_secret"]
         self.refreshToken = self.config["refresh_token"]
         self.sandbox = self.clientId.startswith("sandbox")
+        self.max_workers = self.config.get("max_workers", MAX_WORKERS)
+        self.overlap = timedelta(days=self.config.get("overlap_days", OVERLAP_DAYS))
         self.existing_entries = existing_entries
+        self.dedup = dedup_index(existing_entries)
+        self.balances = {
+            (entry.account, entry.date): entry
+            for entry in existing_entries or []
+            if isinstance(entry, data.Balance)
+        }
+        self.imported = self._last_imported(existing_entries)
+        self.incremental = self.config.get("incremental", False)
+        self.synced = self.state.load() if self.incremental else {}
 
         if self.sandbox:
             self.domain = "truelayer-sandbox.com"
@@ -60,7 +93,7 @@ class Importer(importer.ImporterProtocol):
     def extract(self, file, existing_entries=None):
         self._configure(file, existing_entries)
 
-        r = requests.post(
+        r = self.session.post(
             f"https://auth.{self.domain}/connect/token",
             data={
                 "grant_type": "refresh_token",
@@ -73,11 +106,46 @@ class Importer(importer.ImporterProtocol):
         accessToken = tokens["access_token"]
         headers = {"Authorization": "Bearer " + accessToken}
 
-        entries = []
-        entries.extend(self._extract_endpoint_transactions("accounts", headers))
-        entries.extend(
-            self._extract_endpoint_transactions("cards", headers, invert_sign=True)
-        )
+        # accounts and cards are fetched concurrently, in their original order
+        endpoints = [("accounts", False), ("cards", True)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            listed = pool.map(
+                lambda endpoint: self._list_accounts(endpoint[0], headers), endpoints
+            )
+            jobs = [
+                (endpoint, invert_sign, accountId, local_account)
+                for (endpoint, invert_sign), accounts in zip(endpoints, listed)
+                for accountId, local_account in accounts
+            ]
+            # the ledger date of a local account is only that of its own
+            # TrueLayer account if no other is mapped to it
+            counts = Counter(job[3] for job in jobs)
+            self.shared = {account for account, count in counts.items() if count > 1}
+            results = list(
+                pool.map(
+                    lambda job: self._fetch_transactions(
+                        job[0], job[2], job[3], headers
+                    ),
+                    jobs,
+                )
+            )
+
+            entries = []
+            for (_, invert_sign, _, local_account), transactions in zip(jobs, results):
+                entries.extend(
+                    self._extract_account(transactions, local_account, invert_sign)
+                )
+
+        # remember the last transaction for runs without a ledger
+        synced = {
+            job[2]: dateutil.parser.parse(transactions[-1]["timestamp"])
+            .date()
+            .isoformat()
+            for job, transactions in zip(jobs, results)
+            if transactions
+        }
+        if self.incremental and synced:
+            self.state.update(synced)
 
         return entries
 
@@ -99,9 +167,9 @@ class Importer(importer.ImporterProtocol):
 
         return self.config["accounts"].get(account_id, None)
 
-    def _extract_endpoint_transactions(self, endpoint, headers, invert_sign=False):
-        entries = []
-        r = requests.get(
+    def _list_accounts(self, endpoint, headers):
+        """The (account ID, local account) pairs of an endpoint to import."""
+        r = self.session.get(
             f"https://api.{self.domain}/data/v1/{endpoint}", headers=headers
         )
 
@@ -113,6 +181,7 @@ class Importer(importer.ImporterProtocol):
 
             return []
 
+        accounts = []
         for account in r.json()["results"]:
             accountId = account["account_id"]
 
@@ -122,22 +191,69 @@ class Importer(importer.ImporterProtocol):
                 logging.warning("Ignoring account ID %s", accountId)
                 continue
 
-            r = requests.get(
-                f"https://api.{self.domain}/data/v1/{endpoint}/{accountId}/transactions",
-                headers=headers,
-            )
-            transactions = sorted(r.json()["results"], key=lambda trx: trx["timestamp"])
+            accounts.append((accountId, local_account))
 
-            for trx in transactions:
-                entries.extend(
-                    self._extract_transaction(
-                        trx, local_account, transactions, invert_sign
-                    )
-                )
+        return accounts
+
+    @staticmethod
+    def _last_imported(existing_entries):
+        """Date of the last imported transaction per account."""
+        imported = {}
+        for entry in existing_entries or []:
+            if isinstance(entry, data.Transaction) and "transaction_id" in entry.meta:
+                for posting in entry.postings:
+                    if entry.date > imported.get(posting.account, date.min):
+                        imported[posting.account] = entry.date
+        return imported
+
+    def _since(self, accountId, local_account):
+        """Date from which the transactions of an account are requested.
+
+        Taken from the ledger if there is one, else from the last sync if
+        ``incremental`` is set. The ledger does not tell which account or card
+        a transaction came from, so accounts sharing their local account are
+        fetched completely.
+        """
+        if self.existing_entries is not None:
+            if local_account in self.shared:
+                return None
+            since = self.imported.get(local_account)
+        else:
+            synced = self.synced.get(accountId)
+            since = date.fromisoformat(synced) if synced else None
+
+        return since - self.overlap if since else None
+
+    def _fetch_transactions(self, endpoint, accountId, local_account, headers):
+        params = None
+        since = self._since(accountId, local_account)
+        if since:
+            now = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+            params = {
+                "from": datetime.combine(since, time.min).isoformat(),
+                "to": now.isoformat(),
+            }
+
+        r = self.session.get(
+            f"https://api.{self.domain}/data/v1/{endpoint}/{accountId}/transactions",
+            headers=headers,
+            params=params,
+        )
+        return sorted(r.json()["results"], key=lambda trx: trx["timestamp"])
+
+    def _extract_account(self, transactions, local_account, invert_sign=False):
+        entries = []
+        for trx in transactions:
+            entries.extend(self._extract_transaction(trx, local_account, invert_sign))
+
+        if transactions:
+            entries.extend(
+                self._extract_balance(transactions[-1], local_account, invert_sign)
+            )
 
         return entries
 
-    def _extract_transaction(self, trx, local_account, transactions, invert_sign):
+    def _extract_transaction(self, trx, local_account, invert_sign):
         entries = []
         metakv = {}
 
@@ -182,39 +298,38 @@ class Importer(importer.ImporterProtocol):
                 ),
             ],
         )
+        self.dedup.mark(entry, "transaction_id", local_account)
         entries.append(entry)
 
-        if trx["transaction_id"] == transactions[-1]["transaction_id"]:
+        return entries
+
+    def _extract_balance(self, trx, local_account, invert_sign):
+        """Balance after the last transaction of an account."""
+        entries = []
+
+        # Only if the 'balance' permission is present
+        if "running_balance" in trx:
+            trxDate = dateutil.parser.parse(trx["timestamp"]).date()
             balDate = trxDate + timedelta(days=1)
             metakv = {}
-            if self.existing_entries is not None:
-                for exEntry in self.existing_entries:
-                    if (
-                        isinstance(exEntry, data.Balance)
-                        and exEntry.date == balDate
-                        and exEntry.account == local_account
-                    ):
-                        metakv["__duplicate__"] = True
+            if (local_account, balDate) in self.balances:
+                metakv["__duplicate__"] = True
 
             meta = data.new_metadata("", 0, metakv)
 
-            # Only if the 'balance' permission is present
-            if "running_balance" in trx:
-                tx_balance = D(str(trx["running_balance"]["amount"]))
-                # avoid pylint invalid-unary-operand-type
-                signed_balance = -1 * tx_balance if invert_sign else tx_balance
-
-                entries.append(
-                    data.Balance(
-                        meta,
-                        balDate,
-                        local_account,
-                        amount.Amount(
-                            signed_balance, trx["running_balance"]["currency"]
-                        ),
-                        None,
-                        None,
-                    )
+            tx_balance = D(str(trx["running_balance"]["amount"]))
+            # avoid pylint invalid-unary-operand-type
+            signed_balance = -1 * tx_balance if invert_sign else tx_balance
+
+            entries.append(
+                data.Balance(
+                    meta,
+                    balDate,
+                    local_account,
+                    amount.Amount(signed_balance, trx["running_balance"]["currency"]),
+                    None,
+                    None,
                 )
+            )
 
         return entries
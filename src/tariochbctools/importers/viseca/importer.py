@@ -1,12 +1,14 @@
 import re
 from datetime import datetime
 
-import camelot
 from beancount.core import amount, data
 from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
 
+from tariochbctools.importers.general.pdfPages import iter_page_tables
+from tariochbctools.importers.general.pdfReport import ParseReport
+
 
 class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
     """An importer for Viseca One Card Statement PDF files."""
@@ -15,6 +17,7 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
         identifier.IdentifyMixin.__init__(self, matchers=[("filename", regexps)])
         self.account = account
         self.currency = "CHF"
+        self.report = None
 
     def file_account(self, file):
         return self.account
@@ -45,64 +48,79 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
 
     def extract(self, file, existing_entries):
         entries = []
+        self.report = ParseReport(file.name)
 
         p = re.compile(r"^\d\d\.\d\d\.\d\d$")
 
         columns = ["100,132,400,472,523"]
 
-        firstPageTables = camelot.read_pdf(
-            file.name,
-            flavor="stream",
-            pages="1",
-            table_regions=["65,450,585,50"],
-            columns=columns,
-            split_text=True,
-        )
-        otherPageTables = camelot.read_pdf(
+        pages = iter_page_tables(
             file.name,
-            flavor="stream",
-            pages="2-end",
-            table_regions=["65,650,585,50"],
-            columns=columns,
-            split_text=True,
+            first_page=dict(
+                flavor="stream",
+                table_regions=["65,450,585,50"],
+                columns=columns,
+                split_text=True,
+            ),
+            other_pages=dict(
+                flavor="stream",
+                table_regions=["65,650,585,50"],
+                columns=columns,
+                split_text=True,
+            ),
+            report=self.report,
         )
 
-        tables = [*firstPageTables, *otherPageTables]
-
-        for table in tables:
-            df = table.df
-
-            # skip incompatible tables
-            if df.columns.size != 6:
-                continue
+        for page, tables in pages:
+            pageReport = self.report.page(page)
 
-            lastTrxDate = None
-            lastAmount = None
-            lastDetails = ""
-            for _, row in df.iterrows():
-                date, valueDate, details, _, _, amountChf = tuple(row)
+            for tableIndex, table in enumerate(tables):
+                df = table.df
 
-                if date and not p.match(date) or "Totalbetrag" in details:
+                # skip incompatible tables
+                if df.columns.size != 6:
+                    pageReport.reject(
+                        tableIndex, -1, f"table has {df.columns.size} columns"
+                    )
                     continue
 
-                trxDate = valueDate
-                details = details.strip()
-
-                if amountChf:
-                    if lastTrxDate:
-                        entries.append(
-                            self.createEntry(file, lastTrxDate, lastAmount, lastDetails)
-                        )
-
-                    lastTrxDate = trxDate
-                    lastAmount = amountChf
-                    lastDetails = ""
-
-                lastDetails += details + " "
-
-            if lastTrxDate:
-                entries.append(
-                    self.createEntry(file, lastTrxDate, lastAmount, lastDetails)
-                )
-
+                lastTrxDate = None
+                lastAmount = None
+                lastDetails = ""
+                for rowIndex, row in df.iterrows():
+                    date, valueDate, details, _, _, amountChf = tuple(row)
+
+                    if "Totalbetrag" in details:
+                        pageReport.reject(tableIndex, rowIndex, "total line")
+                        continue
+
+                    if date and not p.match(date):
+                        pageReport.reject(tableIndex, rowIndex, f"no date: {date}")
+                        continue
+
+                    trxDate = valueDate
+                    details = details.strip()
+
+                    if amountChf:
+                        if lastTrxDate:
+                            entries.append(
+                                self.createEntry(
+                                    file, lastTrxDate, lastAmount, lastDetails
+                                )
+                            )
+                            pageReport.accept()
+
+                        lastTrxDate = trxDate
+                        lastAmount = amountChf
+                        lastDetails = ""
+
+                    lastDetails += details + " "
+
+                if lastTrxDate:
+                    entries.append(
+                        self.createEntry(file, lastTrxDate, lastAmount, lastDetails)
+                    )
+                    pageReport.accept()
+
+        self.report.log()
         return entries
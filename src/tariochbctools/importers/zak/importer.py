@@ -1,13 +1,15 @@
 import re
 from datetime import timedelta
 
-import camelot
-import pandas as pd
 from beancount.core import amount, data
 from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
-from dateutil.parser import parse
+
+from tariochbctools.importers.general.dateParser import DateParser
+from tariochbctools.importers.general.dedupIndex import dedup_index
+from tariochbctools.importers.general.pdfPages import iter_page_tables
+from tariochbctools.importers.general.pdfReport import ParseReport
 
 
 class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
@@ -16,6 +18,8 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
     def __init__(self, regexps, account):
         identifier.IdentifyMixin.__init__(self, matchers=[("filename", regexps)])
         self.account = account
+        self.report = None
+        self.parse_date = DateParser(dayfirst=True)
 
     def file_account(self, file):
         return self.account
@@ -29,7 +33,7 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
         meta = data.new_metadata(file.name, 0, {"zakref": bookingRef})
         return data.Transaction(
             meta,
-            parse(date.strip(), dayfirst=True).date(),
+            self.parse_date(date),
             "*",
             "",
             text.strip(),
@@ -46,7 +50,7 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
         meta = data.new_metadata(file.name, 0)
         return data.Balance(
             meta,
-            parse(date.strip(), dayfirst=True).date() + timedelta(days=1),
+            self.parse_date(date) + timedelta(days=1),
             self.account,
             amount.Amount(D(amt), "CHF"),
             None,
@@ -61,62 +65,74 @@ class Importer(identifier.IdentifyMixin, importer.ImporterProtocol):
 
     def extract(self, file, existing_entries):
         entries = []
+        self.report = ParseReport(file.name)
 
-        firstPageTables = camelot.read_pdf(
-            file.name, flavor="stream", pages="1", table_regions=["60,450,600,170"]
-        )
-        otherPageTables = camelot.read_pdf(
-            file.name, flavor="stream", pages="2-end", table_regions=["60,630,600,170"]
+        pages = iter_page_tables(
+            file.name,
+            first_page=dict(flavor="stream", table_regions=["60,450,600,170"]),
+            other_pages=dict(flavor="stream", table_regions=["60,630,600,170"]),
+            report=self.report,
         )
 
-        tables = [*firstPageTables, *otherPageTables]
-
-        df = None
-        for table in tables:
-            cur_df = table.df
-            new_header = cur_df.iloc[0]
-            cur_df = cur_df[1:]
-            cur_df.columns = new_header
-
-            if df is None:
-                df = cur_df
-            else:
-                df = pd.concat([df, cur_df])
-
         date = None
         text = ""
         amount = None
         saldo = None
-        for row in df.itertuples():
-            if row.Saldo:
-                if date and amount:
-                    entries.append(self.createEntry(file, date, amount, text))
-
-                date = None
-                amount = None
-                text = ""
-
-            if row.Valuta:
-                date = row.Valuta
-
-            if row.Text:
-                text += " " + row.Text
-
-            if row.Belastung:
-                amount = -self.cleanNumber(row.Belastung)
-
-            if row.Gutschrift:
-                amount = self.cleanNumber(row.Gutschrift)
-
-            if row.Saldo:
-                saldo = self.cleanNumber(row.Saldo)
+        startPage = None
+        startRow = None
+        for page, tables in pages:
+            pageReport = self.report.page(page)
+
+            for tableIndex, table in enumerate(tables):
+                df = table.df
+                new_header = df.iloc[0]
+                df = df[1:]
+                df.columns = new_header
+
+                for row in df.itertuples():
+                    if row.Saldo:
+                        if date and amount:
+                            entries.append(self.createEntry(file, date, amount, text))
+                            startPage.accept()
+                        elif startPage:
+                            reason = "no amount" if date else "no date"
+                            startPage.reject(*startRow, reason)
+
+                        date = None
+                        amount = None
+                        text = ""
+                        startPage = pageReport
+                        startRow = (tableIndex, row.Index)
+
+                    if row.Valuta:
+                        date = row.Valuta
+
+                    if row.Text:
+                        text += " " + row.Text
+
+                    if row.Belastung:
+                        amount = -self.cleanNumber(row.Belastung)
+
+                    if row.Gutschrift:
+                        amount = self.cleanNumber(row.Gutschrift)
+
+                    if row.Saldo:
+                        newSaldo = self.cleanNumber(row.Saldo)
+                        if saldo is not None and amount is not None:
+                            pageReport.check_balance(
+                                tableIndex, row.Index, saldo + amount, newSaldo
+                            )
+                        saldo = newSaldo
 
         if date and amount:
             entries.append(self.createEntry(file, date, amount, text))
+            startPage.accept()
 
         dateRegexp = re.compile(r"\d\d\.\d\d\.\d\d\d\d")
         m = dateRegexp.search(text)
         date = m.group()
         entries.append(self.createBalanceEntry(file, date, saldo))
 
+        self.report.log()
+        dedup_index(existing_entries).mark_all(entries, "zakref", self.account)
         return entries
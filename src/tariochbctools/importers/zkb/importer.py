@@ -1,36 +1,32 @@
-import re
-
 from tariochbctools.importers.general import mt940importer
 
 
 class ZkbImporter(mt940importer.Importer):
+    extra_details_rules = mt940importer.RewriteRules(
+        [
+            (r"Einkauf ZKB Maestro[- ]Karte", ""),
+            (r"LSV:.*", "LSV"),
+            (r"Gutschrift:.*", "Gutschrift"),
+            (r"eBanking:.*", "eBanking"),
+            (r"eBanking Mobile:.*", "eBanking Mobile"),
+            (r"E-Rechnung:.*", "E-Rechnung"),
+            (r"Kontouebertrag:.*", "Kontouebertrag:"),
+            (r"\?ZKB:\d+ ", ""),
+        ]
+    )
+    transaction_details_rules = mt940importer.RewriteRules(
+        [
+            (r"\?ZI:\?9:\d", ""),
+            (r"\?ZKB:\d+", ""),
+            (r"Einkauf ZKB Maestro[- ]Karte Nr. \d+,", "Maestro"),
+        ]
+    )
+
     def prepare_payee(self, trxdata):
         return ""
 
     def prepare_narration(self, trxdata):
-        extra = trxdata["extra_details"]
-        details = trxdata["transaction_details"]
-
-        extraReplacements = {}
-        extraReplacements[r"Einkauf ZKB Maestro[- ]Karte"] = ""
-        extraReplacements[r"LSV:.*"] = "LSV"
-        extraReplacements[r"Gutschrift:.*"] = "Gutschrift"
-        extraReplacements[r"eBanking:.*"] = "eBanking"
-        extraReplacements[r"eBanking Mobile:.*"] = "eBanking Mobile"
-        extraReplacements[r"E-Rechnung:.*"] = "E-Rechnung"
-        extraReplacements[r"Kontouebertrag:.*"] = "Kontouebertrag:"
-        extraReplacements[r"\?ZKB:\d+ "] = ""
-
-        detailsReplacements = {}
-        detailsReplacements[r"\?ZI:\?9:\d"] = ""
-        detailsReplacements[r"\?ZKB:\d+"] = ""
-        detailsReplacements[r"Einkauf ZKB Maestro[- ]Karte Nr. \d+,"] = "Maestro"
-
-        for pattern, replacement in extraReplacements.items():
-            extra = re.sub(pattern, replacement, extra)
-
-        for pattern, replacement in detailsReplacements.items():
-            details = re.sub(pattern, replacement, details)
+        extra, details = self.rewrite_details(trxdata)
 
         if extra:
             narration = extra.strip() + ": " + details.strip()
@@ -40,19 +36,42 @@ class ZkbImporter(mt940importer.Importer):
         return narration
 
 
-import csv
-
 from beancount.core import amount, data
-from beancount.core.number import D
 from beancount.ingest import importer
 from beancount.ingest.importers.mixins import identifier
-from datetime import datetime
 
+from tariochbctools.importers.general import csvColumns
+from tariochbctools.importers.general.dedupIndex import dedup_index
 
 
 class ZkbCSVImporter(identifier.IdentifyMixin, importer.ImporterProtocol):
     """An importer for ZKB CSV files."""
 
+    FIELDNAMES = [
+        "Date",
+        "Booking text",
+        "Curr",
+        "Amount details",
+        "ZKB reference",
+        "Reference number",
+        "Debit CHF",
+        "Credit CHF",
+        "Value date",
+        "Balance CHF",
+        "Payment purpose",
+        "Details"
+    ]
+
+    SCHEMA = {
+        # Dates with format DD.MM.YYYY
+        "Date": csvColumns.date_column("%d.%m.%Y"),
+        "Booking text": csvColumns.TEXT,
+        "Curr": csvColumns.TEXT,
+        "ZKB reference": csvColumns.TEXT,
+        "Debit CHF": csvColumns.OPTIONAL_DECIMAL,
+        "Credit CHF": csvColumns.DECIMAL,
+    }
+
     def __init__(self, regexps, account):
         identifier.IdentifyMixin.__init__(self, matchers=[("filename", regexps)])
         self.account = account
@@ -67,41 +86,31 @@ class ZkbCSVImporter(identifier.IdentifyMixin, importer.ImporterProtocol):
         entries = []
 
         with open(file.name, 'r', encoding='utf8') as csvfile:
-            reader = csv.DictReader(
-                csvfile,
-                [
-                    "Date",
-                    "Booking text",
-                    "Curr",
-                    "Amount details",
-                    "ZKB reference",
-                    "Reference number",
-                    "Debit CHF",
-                    "Credit CHF",
-                    "Value date",
-                    "Balance CHF",
-                    "Payment purpose",
-                    "Details"
-                ],
-                delimiter=";"
-            )
-            rows = list(reader)[1:]
-
+            try:
+                columns = csvColumns.read_columns(csvfile, self.SCHEMA, self.FIELDNAMES, delimiter=";")
+            except ValueError as e:
+                raise Warning('Error parsing file {}\n{}'.format(file.name, e))
+
+        rows = zip(
+            columns["Date"],
+            columns["Booking text"],
+            columns["Curr"],
+            columns["ZKB reference"],
+            columns["Debit CHF"],
+            columns["Credit CHF"],
+        )
         for index, row in enumerate(rows):
             try:
                 # Parse transaction
+                book_date, description, currency, reference, debit, credit = row
                 meta = data.new_metadata(file.name, index)
-                meta['zkb_reference'] = row['ZKB reference']
-
-                # Parse date with format DD.MM.YYYY
-                book_date = datetime.strptime(row['Date'].strip(), "%d.%m.%Y").date()
-                description = row["Booking text"].strip() if row["Booking text"] else ""
-                
-                currency = row["Curr"].strip() if row["Curr"] else "CHF"
-                if row["Debit CHF"] != "":
-                    cash_flow = amount.Amount(-D(row["Debit CHF"]), currency)
+                meta['zkb_reference'] = reference
+
+                currency = currency or "CHF"
+                if debit is not None:
+                    cash_flow = amount.Amount(-debit, currency)
                 else:
-                    cash_flow = amount.Amount(D(row["Credit CHF"]), currency)
+                    cash_flow = amount.Amount(credit, currency)
 
                 entries.append(data.Transaction(
                     meta,
@@ -119,4 +128,5 @@ class ZkbCSVImporter(identifier.IdentifyMixin, importer.ImporterProtocol):
             except BaseException as e:
                 raise Warning('Error parsing line {}\n{} from file {}'.format(row, e, file.name))
 
+        dedup_index(existing_entries).mark_all(entries, 'zkb_reference', self.account)
         return entries
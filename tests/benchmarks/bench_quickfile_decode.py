@@ -0,0 +1,53 @@
+"""Compare the decoding of QuickFile bank searches.
+
+Run with ``python tests/benchmarks/bench_quickfile_decode.py [count]``.
+"""
+
+import sys
+import timeit
+
+from tariochbctools.importers.quickfile import importer as qfimp
+
+
+def bank_search_body(count):
+    return {
+        "MetaData": {
+            "RecordsetCount": count,
+            "ReturnCount": count,
+            "BankName": "Current Account",
+            "BankType": "CURRENT",
+            "AccountNo": "90145741",
+            "SortCode": "208246",
+            "Currency": "GBP",
+            "CurrentBalance": 3164.97,
+        },
+        "Transactions": {
+            "Transaction": [
+                {
+                    "TransactionDate": "2017-01-04T00:00:00",
+                    "Reference": f"WATERSTONES REF {i}",
+                    "Amount": round(i * 0.37 - 1000, 2),
+                    "TagStatus": None,
+                    "TransactionId": i,
+                }
+                for i in range(count)
+            ]
+        },
+    }
+
+
+def main(count=10000, repeat=5):
+    body = bank_search_body(count)
+    assert qfimp.decode_bank_search(body) == qfimp.QuickFileBankSearch(**body)
+
+    for name, decode in (
+        ("type checked", lambda: qfimp.QuickFileBankSearch(**body)),
+        ("fast", lambda: qfimp.decode_bank_search(body)),
+    ):
+        best = min(timeit.repeat(decode, number=1, repeat=repeat))
+        line = f"{name:>12}: {best * 1000:8.1f} ms for {count} transactions"
+        print(line)  # noqa: T201
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,103 @@
+import datetime
+from io import StringIO
+
+import pytest
+from beancount.core.number import D
+
+from tariochbctools.importers.general import csvColumns
+
+TEST_CSV = """Date;Text;Amount;Fee
+01.02.2023; Coffee ;-4.50;
+01.02.2023;Salary;5000.00;1.00
+03.02.2023;Refund;4.50;
+"""
+
+SCHEMA = {
+    "Date": csvColumns.date_column("%d.%m.%Y"),
+    "Text": csvColumns.TEXT,
+    "Amount": csvColumns.DECIMAL,
+    "Fee": csvColumns.OPTIONAL_DECIMAL,
+}
+
+
+@pytest.fixture(params=["pyarrow", "pandas", "csv"])
+def backend(request, monkeypatch):
+    if request.param == "pyarrow" and csvColumns.pa is None:
+        pytest.skip("pyarrow not installed")
+    if request.param != "pyarrow":
+        monkeypatch.setattr(csvColumns, "pa", None)
+    if request.param == "csv":
+        monkeypatch.setattr(csvColumns, "pd", None)
+    return request.param
+
+
+def test_read_columns(backend):
+    columns = csvColumns.read_columns(StringIO(TEST_CSV), SCHEMA, delimiter=";")
+
+    assert columns["Date"] == [
+        datetime.date(2023, 2, 1),
+        datetime.date(2023, 2, 1),
+        datetime.date(2023, 2, 3),
+    ]
+    assert columns["Text"] == ["Coffee", "Salary", "Refund"]
+    assert csvColumns.read_raw(StringIO(TEST_CSV), delimiter=";")["Amount"] == [
+        "-4.50",
+        "5000.00",
+        "4.50",
+    ]
+    assert columns["Amount"] == [D("-4.50"), D("5000.00"), D("4.50")]
+    assert columns["Fee"] == [None, D("1.00"), None]
+
+
+def test_fieldnames_replace_header(backend):
+    columns = csvColumns.read_columns(
+        StringIO(TEST_CSV),
+        {"day": csvColumns.DATE, "amount": csvColumns.DECIMAL},
+        ["day", "text", "amount", "fee"],
+        delimiter=";",
+    )
+
+    assert columns["day"][2] == datetime.date(2023, 3, 2)
+    assert columns["amount"] == [D("-4.50"), D("5000.00"), D("4.50")]
+
+
+def test_ragged_rows(backend):
+    columns = csvColumns.read_columns(
+        StringIO("a,b\n1,2\n3\n4,5,6\n"),
+        {"a": csvColumns.DECIMAL, "b": csvColumns.TEXT},
+    )
+
+    assert columns["a"] == [D(1), D(3), D(4)]
+    assert columns["b"] == ["2", "", "5"]
+
+
+@pytest.mark.parametrize("skipinitialspace", [False, True])
+def test_trailing_delimiter(backend, skipinitialspace):
+    text = "h1;h2;h3\na;b;c;\nd;e;f;\n"
+
+    named = csvColumns.read_raw(StringIO(text), ["x", "y", "z"], ";", skipinitialspace)
+    header = csvColumns.read_raw(StringIO(text), None, ";", skipinitialspace)
+
+    assert named == {"x": ["a", "d"], "y": ["b", "e"], "z": ["c", "f"]}
+    assert header == {"h1": ["a", "d"], "h2": ["b", "e"], "h3": ["c", "f"]}
+
+
+def test_invalid_cell_raises(backend):
+    with pytest.raises(ValueError, match="line 3: invalid decimal 'x' in column a"):
+        csvColumns.read_columns(StringIO("a\n1\nx\n"), {"a": csvColumns.DECIMAL})
+
+
+def test_invalid_cell_coerced(backend, caplog):
+    columns = csvColumns.read_columns(
+        StringIO("a\n01.01.2023\n31.02.2023\n"),
+        {"a": csvColumns.date_column("%d.%m.%Y")},
+        errors="coerce",
+    )
+
+    assert columns["a"] == [datetime.date(2023, 1, 1), None]
+    assert "line 3: invalid date '31.02.2023' in column a" in caplog.text
+
+
+def test_missing_column(backend):
+    with pytest.raises(ValueError, match="missing columns: c"):
+        csvColumns.read_columns(StringIO("a,b\n1,2\n"), {"c": csvColumns.TEXT})
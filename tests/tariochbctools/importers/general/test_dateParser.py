@@ -0,0 +1,42 @@
+import datetime
+
+from dateutil.parser import parse
+
+from tariochbctools.importers.general.dateParser import DateParser
+
+
+def test_infers_format():
+    parser = DateParser()
+
+    assert parser("2023-01-31") == datetime.date(2023, 1, 31)
+    assert parser.format is None
+    parser("2023-02-01")
+    parser(" 2023-02-02 ")
+
+    assert parser.format == "%Y-%m-%d"
+    assert parser("2023-12-24") == datetime.date(2023, 12, 24)
+
+
+def test_agrees_with_dateutil():
+    values = ["01.02.2023", "03.04.2023", "05.06.2023", "07.08.2023"]
+
+    for dayfirst in (False, True):
+        parser = DateParser(dayfirst=dayfirst)
+        for value in values:
+            assert parser(value) == parse(value, dayfirst=dayfirst).date()
+        assert parser.format == ("%d.%m.%Y" if dayfirst else "%m.%d.%Y")
+
+
+def test_falls_back_on_mismatch():
+    parser = DateParser(sample_size=1)
+
+    assert parser("2023-01-31 10:00:00") == datetime.date(2023, 1, 31)
+    assert parser.format == "%Y-%m-%d %H:%M:%S"
+    assert parser("Feb 3 2023") == datetime.date(2023, 2, 3)
+
+
+def test_unknown_format():
+    parser = DateParser(sample_size=1)
+
+    assert parser("3rd of February 2023") == datetime.date(2023, 2, 3)
+    assert parser.format is None
@@ -0,0 +1,79 @@
+import datetime
+
+from beancount.core import amount, data
+from beancount.core.number import D
+
+from tariochbctools.importers.general import dedupIndex
+
+
+def _transaction(account, **meta):
+    return data.Transaction(
+        data.new_metadata("test", 0, meta),
+        datetime.date(2023, 1, 1),
+        "*",
+        "",
+        "",
+        data.EMPTY_SET,
+        data.EMPTY_SET,
+        [data.Posting(account, amount.Amount(D(1), "CHF"), None, None, None, None)],
+    )
+
+
+def test_find():
+    existing = _transaction("Assets:Bitstamp:BTC", ref="42")
+    index = dedupIndex.DedupIndex([existing, _transaction("Assets:Bank")])
+
+    assert index.find("ref", 42) is existing
+    assert index.find("ref", "42", "Assets:Bitstamp") is existing
+    assert index.find("ref", "42", "Assets:Bit") is None
+    assert index.find("ref", "43") is None
+    assert index.find("nordref", "42") is None
+
+
+def test_mark():
+    index = dedupIndex.DedupIndex([_transaction("Assets:Bank", zakref="1")])
+    known = _transaction("Assets:Bank", zakref="1")
+    new = _transaction("Assets:Bank", zakref="2")
+
+    index.mark_all([known, new], "zakref", "Assets:Bank")
+
+    assert known.meta[dedupIndex.DUPLICATE_META]
+    assert dedupIndex.DUPLICATE_META not in new.meta
+
+
+def test_find_duplicate_entries_skips_marked(monkeypatch):
+    existing = [_transaction("Assets:Bank", ref="1")]
+    marked = _transaction("Assets:Bank", ref="1")
+    marked.meta[dedupIndex.DUPLICATE_META] = True
+    similar = _transaction("Assets:Bank")
+    compared = []
+
+    def find_similar_entries(entries, source_entries):
+        compared.extend(entries)
+        return [(entry, source_entries[0]) for entry in entries]
+
+    monkeypatch.setattr(
+        dedupIndex.similar, "find_similar_entries", find_similar_entries
+    )
+
+    result = dedupIndex.find_duplicate_entries([("file", [marked, similar])], existing)
+
+    assert compared == [similar]
+    [(key, entries)] = result
+    assert key == "file"
+    assert entries[0] is marked
+    assert entries[1].meta[dedupIndex.DUPLICATE_META]
+    assert dedupIndex.DUPLICATE_META not in similar.meta
+
+
+def test_find_duplicate_entries_matches_ledger():
+    existing = [_transaction("Assets:Bank")]
+    new = _transaction("Assets:Bank")
+    other = _transaction("Assets:Other")
+
+    [(_, entries)] = dedupIndex.find_duplicate_entries(
+        [("file", [new, other])], existing
+    )
+
+    assert entries[0].meta[dedupIndex.DUPLICATE_META]
+    assert dedupIndex.DUPLICATE_META not in entries[1].meta
@@ -0,0 +1,114 @@
+import datetime
+import io
+
+import mt940
+from beancount.core import amount, data
+from beancount.core.number import D
+from beancount.ingest import cache
+
+from tariochbctools.importers.bcge.importer import BCGEImporter
+from tariochbctools.importers.general.mt940importer import (
+    Importer,
+    RewriteRules,
+    decode_lines,
+    iter_transactions,
+)
+from tariochbctools.importers.zkb.importer import ZkbImporter
+
+TEST_MT940 = b"""{1:F01ZKBKCHZZ80A0000000000}{2:I940ZKBKCHZZ80AN}{4:
+:20:STARTUMSE
+:25:CH1234567890/CHF
+:28C:00001/001
+:60F:C230101CHF1000,00
+:61:2301020102D12,50NMSCNONREF//B1234
+:86:?ZKB:1234 Einkauf ZKB Maestro Karte
+Einkauf Migros
+:61:2301030103C100,00NTRFNONREF
+:86:Gutschrift: Salary
+:62F:C230103CHF1087,50
+-}
+:20:STARTUMSE
+:25:CH1234567890/CHF
+:28C:00002/001
+:60F:C230103CHF1087,50
+:61:2301050105D7,50NMSCNONREF
+:86:Kontouebertrag: Z\xfcrich
+:62F:C230105CHF1080,00
+"""
+
+
+def test_iter_transactions_matches_full_parse():
+    full = mt940.parse(TEST_MT940.decode("iso8859-15"))
+    streamed = list(iter_transactions(decode_lines(io.BytesIO(TEST_MT940))))
+
+    assert [trx.data for trx in streamed] == [trx.data for trx in full]
+
+
+def test_extract(tmp_path):
+    path = tmp_path / "statement.mt940"
+    path.write_bytes(TEST_MT940)
+
+    entries = Importer(r"\.mt940", "Assets:Bank").extract(cache.get_file(path), [])
+
+    assert [type(entry) for entry in entries] == [
+        data.Transaction,
+        data.Transaction,
+        data.Balance,
+        data.Transaction,
+        data.Balance,
+    ]
+    assert entries[0].meta["ref"] == "B1234"
+    assert entries[3].narration == "Kontouebertrag: Z\xfcrich "
+
+
+def test_extract_closing_balances(tmp_path):
+    path = tmp_path / "statement.mt940"
+    path.write_bytes(TEST_MT940)
+
+    entries = Importer(r"\.mt940", "Assets:Bank").extract(cache.get_file(path), [])
+    balances = [entry for entry in entries if isinstance(entry, data.Balance)]
+
+    assert [(b.date, b.amount) for b in balances] == [
+        (datetime.date(2023, 1, 4), amount.Amount(D("1087.50"), "CHF")),
+        (datetime.date(2023, 1, 6), amount.Amount(D("1080.00"), "CHF")),
+    ]
+    assert balances[0].account == "Assets:Bank"
+
+
+def test_rewrite_rules_single_pass():
+    rules = RewriteRules([(r"LSV:.*", "LSV"), (r"\?ZKB:\d+ ", ""), (r"(a)(b)", "X")])
+
+    assert rules("?ZKB:123 LSV: some debit") == "LSV"
+    assert rules("abab") == "XX"
+
+
+def test_rewrite_rules_literal_replacement():
+    assert RewriteRules([(r"\n", r"\1")])("a\nb") == r"a\1b"
+
+
+def test_empty_rewrite_rules():
+    assert RewriteRules([])("unchanged") == "unchanged"
+
+
+def test_zkb_narration():
+    importer = ZkbImporter(r"\.mt940", "Assets:ZKB")
+    trxdata = {
+        "extra_details": "?ZKB:1234 Einkauf ZKB Maestro Karte",
+        "transaction_details": "Einkauf ZKB Maestro Karte Nr. 12345678, Migros?ZI:?9:1",
+    }
+
+    assert importer.prepare_narration(trxdata) == "Maestro Migros"
+
+
+def test_bcge_narration():
+    importer = BCGEImporter(r"\.mt940", "Assets:BCGE")
+    trxdata = {
+        "extra_details": "Payment\r\n",
+        "transaction_details": "/ORDP/John Doe/BENM/ACME\n Corp/REMI/Invoice 42",
+    }
+
+    assert importer.prepare_payee(trxdata) == "John Doe"
+    assert (
+        importer.prepare_narration(trxdata)
+        == "Payment - Beneficiary: ACME Corp,Remittance: Invoice 42"
+    )
@@ -0,0 +1,54 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from tariochbctools.importers.general import pdfBatch
+
+
+def fake_pdf_to_csv(pdf_file_name, csv_file_name):
+    with open(csv_file_name, "w") as f:
+        f.write("{};{}\n".format(Path(pdf_file_name).stem, os.getpid()))
+
+
+class FakeImporter(pdfBatch.PdfBatchMixin):
+    pdf_to_csv = staticmethod(fake_pdf_to_csv)
+
+    def extract(self, file, existing_entries=None):
+        with open(Path(file.name).with_suffix(".csv")) as f:
+            return [f.read().split(";")[0]]
+
+
+@pytest.fixture(name="pool")
+def pool_fixture():
+    yield
+    pdfBatch.shutdown_pool()
+
+
+def test_extract_batch(tmp_path, pool):
+    files = []
+    for i in range(4):
+        pdf = tmp_path / f"statement{i}.pdf"
+        pdf.write_bytes(b"")
+        files.append(str(pdf))
+
+    result = FakeImporter().extract_batch(files, max_workers=2)
+
+    assert list(result.keys()) == files
+    assert [entries[0] for entries in result.values()] == [
+        f"statement{i}" for i in range(4)
+    ]
+
+
+def test_extract_batch_reuses_existing_csv(tmp_path, pool):
+    pdf = tmp_path / "statement.pdf"
+    pdf.write_bytes(b"")
+    (tmp_path / "statement.csv").write_text("cached;0\n")
+
+    result = FakeImporter().extract_batch([str(pdf)], max_workers=1)
+
+    assert result[str(pdf)] == ["cached"]
+
+
+def test_pool_is_reused(pool):
+    assert pdfBatch.get_pool(1) is pdfBatch.get_pool(1)
@@ -0,0 +1,40 @@
+import datetime
+
+import pandas as pd
+from beancount.core.number import D
+
+from tariochbctools.importers.general.pdfTables import parse_dates, postprocess_table
+
+
+def test_parse_dates_tries_all_formats():
+    dates = parse_dates(pd.Series(["01.02.2023", "03.04.23", "Total"]))
+
+    assert dates[0].date() == datetime.date(2023, 2, 1)
+    assert dates[1].date() == datetime.date(2023, 4, 3)
+    assert pd.isna(dates[2])
+
+
+def test_postprocess_table():
+    raw = pd.DataFrame(
+        [
+            ["Date", "Description", "Amount"],
+            [" 01.02.2023", "Café\nZürich", "1'234.50 "],
+            ["02.02.2023", "Payment", ""],
+            ["03.02.2023", "Broken", "n/a"],
+            ["", "Total", "1'234.50"],
+        ]
+    )
+
+    rows, other = postprocess_table(
+        raw,
+        ["date", "description", "amount"],
+        date="date",
+        amounts=["amount"],
+        text="description",
+        ascii_text=True,
+    )
+
+    assert list(rows["date"]) == [datetime.date(2023, 2, 1), datetime.date(2023, 2, 2)]
+    assert list(rows["description"]) == ["Cafe Zurich", "Payment"]
+    assert list(rows["amount"]) == [D("1234.50"), D("0")]
+    assert list(other["description"]) == ["Description", "Broken", "Total"]
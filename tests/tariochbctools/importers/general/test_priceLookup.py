@@ -0,0 +1,28 @@
+from datetime import date
+
+from beancount import loader
+
+from tariochbctools.importers.general.priceLookup import PriceLookup
+
+LEDGER = """
+2020-01-01 price BTC 8000 CHF
+2020-02-01 price BTC 9000 CHF
+2020-01-15 price EUR 1.07 CHF
+2020-01-20 price CHF 0.9 USD
+"""
+
+
+def test_fetch_price_amounts_matches_single_lookups():
+    entries, _, _ = loader.load_string(LEDGER)
+    lookup = PriceLookup(entries, "CHF")
+    lookups = [
+        (instrument, date(2020, month, day))
+        for instrument in ("BTC", "EUR", "USD", "ETH", "CHF")
+        for month, day in ((1, 1), (1, 10), (1, 31), (2, 1), (3, 1), (1, 20))
+    ]
+
+    prices = lookup.fetchPriceAmounts(lookups)
+
+    assert prices == {key: lookup.fetchPriceAmount(*key) for key in lookups}
+    assert prices[("BTC", date(2020, 1, 31))] == 8000
+    assert prices[("ETH", date(2020, 1, 31))] is None
@@ -0,0 +1,79 @@
+from tariochbctools.importers.general.stateStore import JsonStateStore
+from tariochbctools.importers.general.watermark import (
+    Watermark,
+    commit_pending,
+    discard_pending,
+)
+
+HEADER = "date;amount\n"
+
+
+def _store(tmp_path):
+    return JsonStateStore("watermarks", tmp_path / "watermarks.json")
+
+
+def _watermark(tmp_path, newest_first=False):
+    return Watermark("test", newest_first=newest_first, store=_store(tmp_path))
+
+
+def _import(watermark, tmp_path, last=None):
+    watermark.stage(last)
+    assert commit_pending(_store(tmp_path)) == ["test"]
+
+
+def test_appended_rows(tmp_path):
+    export = tmp_path / "export.csv"
+    export.write_text(HEADER + "2023-01-01;1\n")
+
+    watermark = _watermark(tmp_path)
+    assert watermark.read(export) == HEADER + "2023-01-01;1\n"
+    _import(watermark, tmp_path, "2023-01-01")
+
+    export.write_text(HEADER + "2023-01-01;1\n2023-01-02;2\n")
+    watermark = _watermark(tmp_path)
+    assert watermark.read(export) == HEADER + "2023-01-02;2\n"
+    _import(watermark, tmp_path)
+
+    assert _watermark(tmp_path).read(export) == HEADER
+
+
+def test_prepended_rows(tmp_path):
+    export = tmp_path / "export.csv"
+    export.write_text(HEADER + "2023-01-01;1\n")
+
+    watermark = _watermark(tmp_path, newest_first=True)
+    watermark.read(export)
+    _import(watermark, tmp_path)
+
+    export.write_text(HEADER + "2023-01-03;3\n2023-01-02;2\n2023-01-01;1\n")
+    assert (
+        _watermark(tmp_path, newest_first=True).read(export)
+        == HEADER + "2023-01-03;3\n2023-01-02;2\n"
+    )
+
+
+def test_not_committed(tmp_path):
+    export = tmp_path / "export.csv"
+    export.write_text(HEADER + "2023-01-01;1\n")
+
+    _watermark(tmp_path).read(export)
+    watermark = _watermark(tmp_path)
+    watermark.read(export)
+    watermark.stage()
+
+    assert _watermark(tmp_path).read(export) == HEADER + "2023-01-01;1\n"
+    assert discard_pending(_store(tmp_path)) == ["test"]
+    assert commit_pending(_store(tmp_path)) == []
+    assert _watermark(tmp_path).read(export) == HEADER + "2023-01-01;1\n"
+
+
+def test_changed_file_is_read_again(tmp_path):
+    export = tmp_path / "export.csv"
+    export.write_text(HEADER + "2023-01-01;1\n")
+
+    watermark = _watermark(tmp_path)
+    watermark.read(export)
+    _import(watermark, tmp_path)
+
+    export.write_text(HEADER + "2023-01-05;5\n2023-01-06;6\n")
+    assert _watermark(tmp_path).read(export) == HEADER + "2023-01-05;5\n2023-01-06;6\n"
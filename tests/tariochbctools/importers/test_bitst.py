@@ -0,0 +1,87 @@
+from datetime import date, timedelta
+
+import pytest
+from beancount import loader
+from beancount.ingest import cache
+
+from tariochbctools.importers.bitst import importer as bitstimp
+
+TEST_CONFIG = b"""
+username: user
+key: key
+secret: secret
+currencies: [btc, eur]
+account: Assets:Bitstamp
+otherExpensesAccount: Expenses:Fees
+capGainAccount: Income:CapitalGains
+monthCutoff: 12
+"""
+
+
+def trade(id, day):
+    return {
+        "id": id,
+        "type": 2,
+        "datetime": (date.today() - timedelta(days=day)).isoformat() + " 10:00:00",
+        "btc": "0.01000000",
+        "eur": "-100.00",
+        "btc_eur": "10000",
+        "fee": "0.50",
+    }
+
+
+class FakeClient:
+    def __init__(self, trxs):
+        self.trxs = trxs
+        self.offsets = []
+
+    def user_transactions(self, offset=0, limit=100):
+        self.offsets.append(offset)
+        return self.trxs[offset:][:limit]
+
+
+@pytest.fixture(name="tmp_config")
+def tmp_config_fixture(tmp_path):
+    config = tmp_path / "bitstamp.yaml"
+    config.write_bytes(TEST_CONFIG)
+    yield cache.get_file(config)
+
+
+@pytest.fixture(name="prices")
+def prices_fixture():
+    day = date.today() - timedelta(days=600)
+    prices, _, _ = loader.load_string(f"{day} price EUR 0.95 CHF\n")
+    yield prices
+
+
+@pytest.fixture(name="importer")
+def bitstamp_importer_fixture(monkeypatch):
+    monkeypatch.setattr(bitstimp, "PAGE_SIZE", 2)
+    trxs = [trade(id, day) for id, day in ((5, 1), (4, 2), (3, 3), (2, 4), (1, 500))]
+    client = FakeClient(trxs)
+    monkeypatch.setattr(bitstimp.bitstamp.client, "Trading", lambda **kwargs: client)
+    yield bitstimp.Importer()
+
+
+def test_extract_pages_until_cutoff(importer, tmp_config, prices):
+    entries = importer.extract(tmp_config, prices)
+
+    assert [e.meta["ref"] for e in entries] == ["2", "3", "4", "5"]
+    assert importer.client.offsets == [0, 2, 4]
+
+
+def test_extract_stops_at_last_imported(importer, tmp_config, prices):
+    existing = prices + importer.extract(tmp_config, prices)[:2]
+
+    entries = importer.extract(tmp_config, existing)
+
+    assert [e.meta["ref"] for e in entries] == ["4", "5"]
+    assert importer.client.offsets[-2:] == [0, 2]
+
+
+def test_extract_uses_rates(importer, tmp_config, prices):
+    entries = importer.extract(tmp_config, prices)
+
+    fee = entries[0].postings[2]
+    assert fee.account == "Expenses:Fees"
+    assert fee.units.number == round(bitstimp.D("0.50") * bitstimp.D("0.95"), 2)
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from beancount import loader
+from beancount.ingest import cache
+
+from tariochbctools.importers.blockchain import importer as bcimp
+from tariochbctools.importers.general.stateStore import JsonStateStore
+
+TEST_CONFIG = b"""
+base_ccy: CHF
+addresses:
+  - address: address-1
+    currency: BTC
+    narration: First
+    asset_account: Assets:Crypto:BTC
+  - address: address-2
+    currency: BTC
+    narration: Second
+    asset_account: Assets:Crypto:BTC
+"""
+
+# the chain is at block 110, address-1 got a transaction in every block
+TIP = 110
+PAGE_SIZE = 4
+
+
+def txref(address, height, tx_hash=None):
+    return {
+        "tx_hash": tx_hash or f"{address}-{height}",
+        "block_height": height,
+        "confirmations": TIP - height + 1,
+        "confirmed": datetime(2020, 1, 1, tzinfo=timezone.utc)
+        + timedelta(hours=height),
+        "value": 100000,
+    }
+
+
+class FakeBlockcypher:
+    def __init__(self):
+        self.requests = []
+        self.txrefs = {
+            "address-1": [txref("address-1", h) for h in range(TIP, 99, -1)],
+            "address-2": [txref("address-2", 105)],
+        }
+        self.rate_limited = 0
+
+    def get_address_details(
+        self,
+        address,
+        coin_symbol,
+        txn_limit=None,
+        api_key=None,
+        before_bh=None,
+        after_bh=None,
+    ):
+        if self.rate_limited:
+            self.rate_limited -= 1
+            raise bcimp.RateLimitError("Status Code 429")
+        self.requests.append((address, before_bh, after_bh))
+        txrefs = [
+            trx
+            for trx in self.txrefs[address]
+            if (before_bh is None or trx["block_height"] < before_bh)
+            and (after_bh is None or trx["block_height"] > after_bh)
+        ]
+        return {"txrefs": txrefs[:txn_limit], "hasMore": len(txrefs) > txn_limit}
+
+
+@pytest.fixture(name="tmp_config")
+def tmp_config_fixture(tmp_path):
+    config = tmp_path / "blockchain.yaml"
+    config.write_bytes(TEST_CONFIG)
+    yield cache.get_file(config)
+
+
+@pytest.fixture(name="importer")
+def blockchain_importer_fixture(tmp_path, monkeypatch):
+    fake = FakeBlockcypher()
+    monkeypatch.setattr(
+        bcimp.blockcypher, "get_address_details", fake.get_address_details
+    )
+    monkeypatch.setattr(bcimp, "TXN_LIMIT", PAGE_SIZE)
+    importer = bcimp.Importer()
+    importer.state = JsonStateStore("blockchain", tmp_path / "state.json")
+    importer.fake = fake
+    yield importer
+
+
+@pytest.fixture(name="prices")
+def prices_fixture():
+    prices, _, _ = loader.load_string("2019-12-01 price BTC 7000 CHF\n")
+    yield prices
+
+
+def test_extract_pages_all_transactions(importer, tmp_config, prices):
+    entries = importer.extract(tmp_config, prices)
+
+    refs = [e.meta["ref"] for e in entries]
+    assert refs == [f"address-1-{h}" for h in range(110, 99, -1)] + ["address-2-105"]
+    assert entries[-1].narration == "Second"
+
+
+def test_extract_fetches_only_new_blocks(importer, tmp_config, prices):
+    first = importer.extract(tmp_config, prices)
+    importer.fake.requests = []
+
+    entries = importer.extract(tmp_config, prices)
+
+    assert [e.meta["ref"] for e in entries] == [e.meta["ref"] for e in first]
+    # transactions with less than 6 confirmations are requested again
+    assert sorted(importer.fake.requests, key=str) == [
+        ("address-1", 108, 105),
+        ("address-1", None, 105),
+        ("address-2", None, 105),
+    ]
+
+
+def test_extract_requests_large_block_again(importer, tmp_config, prices):
+    importer.fake.txrefs["address-2"] = [
+        txref("address-2", 105, f"address-2-105-{i}") for i in range(6)
+    ] + [txref("address-2", 101)]
+
+    entries = importer.extract(tmp_config, prices)
+
+    refs = [e.meta["ref"] for e in entries if e.narration == "Second"]
+    assert refs == [f"address-2-105-{i}" for i in range(6)] + ["address-2-101"]
+
+
+def test_extract_retries_rate_limited_request(
+    importer, tmp_config, prices, monkeypatch
+):
+    waits = []
+    monkeypatch.setattr(bcimp.time, "sleep", waits.append)
+    importer.fake.rate_limited = 2
+
+    entries = importer.extract(tmp_config, prices)
+
+    assert waits == [1, 2]
+    assert len(entries) == 12
@@ -0,0 +1,33 @@
+import datetime
+
+from beancount.core.number import D
+from beancount.ingest import cache
+
+from tariochbctools.importers.neon import importer as neonimp
+
+# newest first, every row ends with a delimiter
+TEST_CSV = """"Date";"Amount";"Original amount";"Original currency";"Exchange rate";"Description";"Subject";"Category";"Tags";"Wise";"Spaces"
+"2023-02-03";"-12.30";"-13.00";"EUR";"0.946";"Bakery";"";"food";"";"no";"no";
+"2023-02-01";"100.00";"";"";"";"Salary";"";"income";"";"no";"no";
+"""
+
+
+def test_extract(tmp_path):
+    csv = tmp_path / "neon.csv"
+    csv.write_text(TEST_CSV)
+    importer = neonimp.Importer("neon.csv", "Assets:Neon", {"Salary": ["ACME", "Pay"]})
+
+    entries = importer.extract(cache.get_file(csv), [])
+
+    assert [e.date for e in entries] == [
+        datetime.date(2023, 2, 1),
+        datetime.date(2023, 2, 3),
+    ]
+    assert [(e.payee, e.narration) for e in entries] == [
+        ("ACME", "Pay"),
+        ("", "Bakery"),
+    ]
+    assert [e.postings[0].units.number for e in entries] == [D("100.00"), D("-12.30")]
+    assert entries[0].postings[0].meta["category"] == "income"
+    assert entries[1].postings[0].meta["original_currency"] == "EUR"
+    assert entries[1].postings[0].meta["exchange_rate"] == "0.946"
@@ -0,0 +1,251 @@
+import pytest
+import requests
+from beancount.ingest import cache
+
+from tariochbctools.importers.general.stateStore import JsonStateStore
+from tariochbctools.importers.nordigen import importer as nordimp
+from tariochbctools.importers.nordigen import nordigen_config
+
+# pylint: disable=protected-access
+
+TEST_CONFIG = b"""
+    secret_id: id
+    secret_key: key
+    accounts:
+      - id: account-1
+        asset_account: Assets:Revolut:CHF
+      - id: account-2
+        asset_account: Assets:Revolut:EUR
+"""
+
+
+def transaction(accountId):
+    return {
+        "transactionId": accountId + "-trx",
+        "bookingDate": "2023-01-05",
+        "transactionAmount": {"amount": "-12.50", "currency": "CHF"},
+        "remittanceInformationUnstructured": accountId,
+    }
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200, headers=None):
+        self.payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = ""
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(response=self)
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    def __init__(self, responses=None):
+        self.responses = responses or {}
+        self.requested = []
+        self.posted = []
+
+    def post(self, url, data):
+        self.posted.append(url.rsplit("/", 2)[1])
+        if url.endswith("/token/refresh/"):
+            return FakeResponse({"access": "renewed", "access_expires": 86400})
+        return FakeResponse(
+            {
+                "access": "token",
+                "access_expires": 86400,
+                "refresh": "refresh",
+                "refresh_expires": 2592000,
+            }
+        )
+
+    def get(self, url, headers):
+        self.token = headers["Authorization"]
+        accountId = url.split("/accounts/")[1].split("/")[0]
+        self.requested.append(accountId)
+        queue = self.responses.get(accountId)
+        if queue:
+            return queue.pop(0)
+        return FakeResponse(
+            {"transactions": {"booked": [transaction(accountId)]}},
+            headers={
+                "HTTP_X_RATELIMIT_ACCOUNT_SUCCESS_REMAINING": "3",
+                "HTTP_X_RATELIMIT_ACCOUNT_SUCCESS_RESET": "3600",
+            },
+        )
+
+
+@pytest.fixture(name="tmp_config")
+def tmp_config_fixture(tmp_path):
+    config = tmp_path / "nordigen.yaml"
+    config.write_bytes(TEST_CONFIG)
+    yield cache.get_file(config)
+
+
+@pytest.fixture(name="importer")
+def nordigen_importer_fixture(tmp_path):
+    importer = nordimp.Importer()
+    importer.state = JsonStateStore("nordigen", tmp_path / "state.json")
+    yield importer
+
+
+def test_identify(importer, tmp_config):
+    assert importer.identify(tmp_config)
+
+
+def test_extract_keeps_account_order(importer, tmp_config):
+    importer.session = FakeSession()
+
+    entries = importer.extract(tmp_config, [])
+
+    assert [e.narration for e in entries] == ["account-1", "account-2"]
+    assert entries[1].postings[0].account == "Assets:Revolut:EUR"
+    assert importer.state.get("quota")["account-2"]["remaining"] == 3
+
+
+def test_extract_marks_duplicate(importer, tmp_config):
+    importer.session = FakeSession()
+    existing = importer.extract(tmp_config, [])
+
+    entries = importer.extract(tmp_config, existing[:1])
+
+    assert entries[0].meta["__duplicate__"]
+    assert not entries[1].meta.get("__duplicate__")
+
+
+def test_extract_waits_for_rate_limit(importer, tmp_config, monkeypatch):
+    waits = []
+    monkeypatch.setattr(nordimp.time, "sleep", waits.append)
+    importer.session = FakeSession(
+        {"account-1": [FakeResponse({}, 429, {"Retry-After": "2"})]}
+    )
+
+    entries = importer.extract(tmp_config, [])
+
+    assert waits == [2]
+    assert [e.narration for e in entries] == ["account-1", "account-2"]
+
+
+def test_extract_skips_exhausted_account(importer, tmp_config):
+    headers = {
+        "HTTP_X_RATELIMIT_ACCOUNT_SUCCESS_REMAINING": "0",
+        "HTTP_X_RATELIMIT_ACCOUNT_SUCCESS_RESET": "36000",
+    }
+    importer.session = FakeSession({"account-1": [FakeResponse({}, 429, headers)]})
+
+    entries = importer.extract(tmp_config, [])
+    assert [e.narration for e in entries] == ["account-2"]
+
+    # the recorded quota spares the request on the next run
+    importer.session = FakeSession()
+    entries = importer.extract(tmp_config, [])
+    assert [e.narration for e in entries] == ["account-2"]
+    assert importer.session.requested == ["account-2"]
+
+
+def test_extract_raises_on_error(importer, tmp_config):
+    importer.session = FakeSession({"account-2": [FakeResponse({}, 500)]})
+
+    with pytest.raises(nordimp.HttpServiceException):
+        importer.extract(tmp_config, [])
+
+
+def test_extract_reuses_token(importer, tmp_config):
+    importer.session = FakeSession()
+
+    importer.extract(tmp_config, [])
+    importer.extract(tmp_config, [])
+
+    assert importer.session.posted == ["new"]
+
+
+def test_expired_token_is_refreshed(importer, tmp_config):
+    importer.session = FakeSession()
+    importer.extract(tmp_config, [])
+
+    tokens = importer.state.get("token:id")
+    tokens["access_expires"] = "2000-01-01T00:00:00+00:00"
+    importer.state.set("token:id", tokens)
+    importer.extract(tmp_config, [])
+
+    assert importer.session.posted == ["new", "refresh"]
+    assert importer.session.token == "Bearer renewed"
+    assert importer.state.get("token:id")["refresh"] == "refresh"
+
+
+class FakeConfigSession:
+    def __init__(self):
+        self.requested = []
+
+    def get(self, url, headers, params=None):
+        path = url.split("/api/v2/")[1]
+        self.requested.append(path)
+        if path == "institutions/":
+            return FakeResponse([{"name": "Revolut", "id": "REVOLUT_REVOGB21"}])
+        if path == "requisitions/":
+            return FakeResponse(
+                {
+                    "results": [
+                        {"reference": "one", "accounts": ["a1", "a2"]},
+                        {"reference": "two", "accounts": ["a3"]},
+                    ]
+                }
+            )
+        account = path.split("/")[1]
+        if path.endswith("/details"):
+            return FakeResponse({"account": {"currency": "CHF"}})
+        return FakeResponse({"institution_id": "REVOLUT", "iban": "IBAN-" + account})
+
+
+def test_institutions_are_cached(tmp_path):
+    session = FakeConfigSession()
+    store = JsonStateStore("nordigen", tmp_path / "state.json")
+
+    for refresh in (False, False, True):
+        institutions = nordigen_config.get_institutions(
+            "token", "GB", refresh, session, store
+        )
+
+    assert institutions == [{"name": "Revolut", "id": "REVOLUT_REVOGB21"}]
+    assert session.requested == ["institutions/", "institutions/"]
+
+
+def test_list_accounts_keeps_order(capsys):
+    nordigen_config.list_accounts("token", FakeConfigSession())
+
+    lines = capsys.readouterr().out.splitlines()[1:]
+    assert lines == [
+        "Reference: one",
+        "a1: REVOLUT - IBAN-a1 CHF",
+        "a2: REVOLUT - IBAN-a2 CHF",
+        "Reference: two",
+        "a3: REVOLUT - IBAN-a3 CHF",
+    ]
+
+
+def test_rejected_token_is_renewed(importer, tmp_config):
+    importer.session = FakeSession()
+    importer.extract(tmp_config, [])
+
+    importer.session = FakeSession({"account-1": [FakeResponse({}, 401)]})
+    entries = importer.extract(tmp_config, [])
+
+    assert [e.narration for e in entries] == ["account-1", "account-2"]
+    assert importer.session.posted == ["new"]
+    assert importer.session.requested.count("account-1") == 2
+
+
+def test_token_rejected_twice_raises(importer, tmp_config):
+    importer.session = FakeSession(
+        {"account-1": [FakeResponse({}, 403), FakeResponse({}, 403)]}
+    )
+
+    with pytest.raises(nordimp.HttpServiceException):
+        importer.extract(tmp_config, [])
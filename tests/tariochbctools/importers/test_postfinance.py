@@ -0,0 +1,79 @@
+import datetime
+
+import pytest
+from beancount.core import data
+from beancount.core.number import D
+from beancount.ingest import cache
+
+from tariochbctools.importers.postfinance import importer as pfimp
+
+HEADER = "Buchungsdatum;Avisierungstext;Gutschrift in CHF;Lastschrift in CHF;Valuta;Saldo in CHF\n"
+
+# oldest first, as exported
+ROWS = [
+    "2023-01-30;Salary;1000.00;;2023-01-30;1100.00\n",
+    "2023-01-30;Rent;;-1000.00;2023-01-30;100.00\n",
+    "2023-01-31;Refund;50.00;;2023-01-31;150.00\n",
+    "2023-02-28;Coffee;;-5.00;2023-02-28;145.00\n",
+]
+
+
+def extract(tmp_path, rows):
+    csv = tmp_path / "postfinance.csv"
+    csv.write_bytes((HEADER + "".join(rows)).encode("windows_1252"))
+    importer = pfimp.Importer("postfinance.csv", "Assets:PostFinance")
+    return importer.extract(cache.get_file(csv), [])
+
+
+def summary(entries):
+    return [
+        (
+            (entry.date, entry.narration, entry.postings[0].units.number)
+            if isinstance(entry, data.Transaction)
+            else (entry.date, "balance", entry.amount.number)
+        )
+        for entry in entries
+    ]
+
+
+@pytest.mark.parametrize("rows", [ROWS, ROWS[::-1]], ids=["ascending", "descending"])
+def test_extract_ordered(tmp_path, rows):
+    entries = extract(tmp_path, rows)
+
+    # the days of a newest first export are emitted oldest first, the rows of
+    # a day in the order of the file
+    salary, rent = (
+        [("Salary", D("1000.00")), ("Rent", D("-1000.00"))]
+        if rows is ROWS
+        else [("Rent", D("-1000.00")), ("Salary", D("1000.00"))]
+    )
+    assert summary(entries) == [
+        (datetime.date(2023, 1, 30), *salary),
+        (datetime.date(2023, 1, 30), *rent),
+        (datetime.date(2023, 1, 31), "Refund", D("50.00")),
+        (datetime.date(2023, 2, 1), "balance", D("150.00")),
+        (datetime.date(2023, 2, 28), "Coffee", D("-5.00")),
+        (datetime.date(2023, 3, 1), "balance", D("145.00")),
+    ]
+
+
+def test_extract_unordered(tmp_path):
+    entries = extract(tmp_path, [ROWS[2], ROWS[0], ROWS[1], ROWS[3]])
+
+    assert summary(entries) == [
+        (datetime.date(2023, 1, 30), "Salary", D("1000.00")),
+        (datetime.date(2023, 1, 30), "Rent", D("-1000.00")),
+        (datetime.date(2023, 1, 31), "Refund", D("50.00")),
+        (datetime.date(2023, 2, 1), "balance", D("150.00")),
+        (datetime.date(2023, 2, 28), "Coffee", D("-5.00")),
+        (datetime.date(2023, 3, 1), "balance", D("145.00")),
+    ]
+
+
+def test_extract_single_day(tmp_path):
+    entries = extract(tmp_path, ROWS[2:3])
+
+    assert summary(entries) == [
+        (datetime.date(2023, 1, 31), "Refund", D("50.00")),
+        (datetime.date(2023, 2, 1), "balance", D("150.00")),
+    ]
@@ -199,3 +199,79 @@ def test_bank_search_with_dates():
         }
     }
     under_test._post.assert_called_with("bank/search", expected_search_parameters)
+
+
+def fake_bank_search_post(submissions):
+    """A _post answering bank searches from 450 numbered transactions."""
+
+    def _post(self, endpoint, endpoint_data):
+        submissions.append(self.submission_number)
+        parameters = endpoint_data["SearchParameters"]
+        offset = int(parameters["Offset"])
+        count = int(parameters["ReturnCount"])
+        response = json.loads(TEST_BANK_SEARCH)
+        body = response["Bank_Search"]["Body"]
+        body["MetaData"]["RecordsetCount"] = 450
+        trx = body["Transactions"]["Transaction"][0]
+        body["Transactions"]["Transaction"] = [
+            dict(trx, TransactionId=i) for i in range(offset, min(offset + count, 450))
+        ]
+        return response
+
+    return _post
+
+
+def test_bank_search_pages(monkeypatch):
+    submissions = []
+    monkeypatch.setattr(qfimp.QuickFile, "_post", fake_bank_search_post(submissions))
+    under_test = qfimp.QuickFile("37823", "an_api_key", "an_app_id")
+
+    pages = list(under_test.bank_search_pages("1200", 200, "2017-01-01"))
+
+    assert [len(p.Transactions["Transaction"]) for p in pages] == [200, 200, 50]
+    ids = [t.TransactionId for p in pages for t in p.Transactions["Transaction"]]
+    assert ids == [str(i) for i in range(450)]
+    assert len(set(submissions)) == 3
+
+
+def test_extract_bank_transactions_with_from_date(importer_factory, monkeypatch):
+    monkeypatch.setattr(qfimp.QuickFile, "_post", fake_bank_search_post([]))
+    importer = importer_factory(TEST_CONFIG + b"from_date: 2017-01-01\n")
+
+    entries = importer._extract_bank_transactions(1200)
+
+    assert len(entries) == 450
+    assert entries[-1].meta["quickfile_id"] == "449"
+
+
+def test_extract_bank_transactions_without_from_date(importer, monkeypatch):
+    monkeypatch.setattr(qfimp.QuickFile, "_post", fake_bank_search_post([]))
+
+    entries = importer._extract_bank_transactions(1200)
+
+    assert len(entries) == 200
+
+
+def bank_search_body(count):
+    body = json.loads(TEST_BANK_SEARCH)["Bank_Search"]["Body"]
+    trx = body["Transactions"]["Transaction"][0]
+    body["Transactions"]["Transaction"] = [
+        dict(trx, TransactionId=i, Amount=round(i * 0.37 - 1000, 2))
+        for i in range(count)
+    ]
+    return body
+
+
+def test_decode_bank_search_matches_type_checked():
+    body = bank_search_body(10000)
+
+    assert qfimp.decode_bank_search(body) == qfimp.QuickFileBankSearch(**body)
+
+
+def test_bank_search_validates_on_request():
+    under_test = qfimp.QuickFile("37823", "an_api_key", "an_app_id", validate=True)
+    under_test._post = MagicMock()
+    under_test._post.return_value = json.loads(TEST_BANK_SEARCH)
+
+    bs = under_test.bank_search("37823", 1)
+    assert bs.Transactions["Transaction"][0].Amount == "-4.75"
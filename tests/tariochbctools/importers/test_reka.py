@@ -0,0 +1,65 @@
+import datetime
+from types import SimpleNamespace
+
+import pandas as pd
+from beancount.core.number import D
+
+from tariochbctools.importers.general.pdfReport import ParseReport
+from tariochbctools.importers.reka import importer as rekaimp
+
+
+def fake_pages(*pages):
+    def _iter_page_tables(pdf_file_name, first_page, other_pages, report=None):
+        for number, rows in enumerate(pages, start=1):
+            yield number, [SimpleNamespace(df=pd.DataFrame(rows))]
+
+    return _iter_page_tables
+
+
+def test_parse_pdf_merges_description_across_pages(monkeypatch):
+    monkeypatch.setattr(
+        rekaimp,
+        "iter_page_tables",
+        fake_pages(
+            [
+                ["01.02.2023", "Shop", "1234", "12.50", "", "87.50"],
+                ["02.02.2023", "Restaurant", "1234", "30.00", "", "57.50"],
+            ],
+            [
+                ["", "Lunch", "", "", "", ""],
+                ["03.02.2023", "Top-up", "", "", "100.00", "157.50"],
+            ],
+        ),
+    )
+
+    transactions = list(rekaimp.parse_pdf("statement.pdf"))
+
+    assert transactions == [
+        [datetime.date(2023, 2, 1), D("-12.50"), "Shop"],
+        [datetime.date(2023, 2, 2), D("-30.00"), "Restaurant Lunch"],
+        [datetime.date(2023, 2, 3), D("100.00"), "Top-up"],
+    ]
+
+
+def test_parse_pdf_report(monkeypatch):
+    monkeypatch.setattr(
+        rekaimp,
+        "iter_page_tables",
+        fake_pages(
+            [
+                ["Datum", "Text", "Karte", "Belastung", "Gutschrift", "Saldo"],
+                ["01.02.2023", "Shop", "1234", "12.50", "", "87.50"],
+            ],
+            [
+                ["02.02.2023", "Restaurant", "1234", "30.00", "", "50.00"],
+            ],
+        ),
+    )
+    report = ParseReport("statement.pdf")
+
+    list(rekaimp.parse_pdf("statement.pdf", report))
+
+    assert [page.rows_accepted for page in report.pages] == [1, 1]
+    assert report.pages[0].rows_rejected[0].reason == "no date: Datum"
+    assert len(report.failed_balance_checks) == 1
+    assert report.failed_balance_checks[0].expected == D("57.50")
@@ -0,0 +1,71 @@
+import datetime
+
+from beancount.core import data
+from beancount.core.number import D
+from beancount.ingest import cache
+
+from tariochbctools.importers.revolut import importer as revolutimp
+
+HEADER = (
+    "Type,Product,Started Date,Completed Date,Description,Amount,Fee,Currency,"
+    "State,Balance\n"
+)
+
+# the card payment started on the 10th is only completed on the 12th
+TEST_CSV = HEADER + (
+    "CARD_PAYMENT,Current,2023-01-10 09:00:00,2023-01-12 08:00:00,Hotel,-50.00,0.00,CHF,COMPLETED,850.00\n"
+    "CARD_PAYMENT,Current,2023-01-11 12:00:00,2023-01-11 12:00:00,Coffee,-5.00,0.00,CHF,COMPLETED,900.00\n"
+    "TOPUP,Current,2023-01-11 13:00:00,2023-01-11 13:00:00,Top-up,100.00,0.00,EUR,COMPLETED,100.00\n"
+    "EXCHANGE,Current,2023-01-12 10:00:00,2023-01-12 10:00:00,To CHF,-20.00,0.50,EUR,COMPLETED,79.50\n"
+    "CARD_PAYMENT,Current,2023-01-13 10:00:00,,Shop,-10.00,0.00,CHF,PENDING,\n"
+)
+
+
+def extract(tmp_path, text):
+    csv = tmp_path / "revolut.csv"
+    csv.write_text(text)
+    importer = revolutimp.Importer(
+        "revolut.csv", "Assets:Revolut", "Expenses:Fee", "CHF"
+    )
+    return importer.extract(cache.get_file(csv), [])
+
+
+def balances(entries):
+    return {
+        entry.amount.currency: (entry.date, entry.amount.number)
+        for entry in entries
+        if isinstance(entry, data.Balance)
+    }
+
+
+def test_extract_transactions(tmp_path):
+    entries = extract(tmp_path, TEST_CSV)
+
+    transactions = [e for e in entries if isinstance(e, data.Transaction)]
+    assert [(t.narration, t.postings[0].units.number) for t in transactions] == [
+        ("CARD_PAYMENT Hotel", D("-50.00")),
+        ("CARD_PAYMENT Coffee", D("-5.00")),
+        ("TOPUP Top-up", D("100.00")),
+        ("EXCHANGE To CHF", D("-20.50")),
+    ]
+    assert transactions[0].date == datetime.date(2023, 1, 10)
+
+
+def test_balance_of_row_completed_last(tmp_path):
+    entries = extract(tmp_path, TEST_CSV)
+
+    assert balances(entries) == {
+        "CHF": (datetime.date(2023, 1, 13), D("850.00")),
+        "EUR": (datetime.date(2023, 1, 13), D("79.50")),
+    }
+
+
+def test_balance_after_last_entry(tmp_path):
+    # completed on the 10th but only started on the 11th, e.g. a refund
+    text = HEADER + (
+        "REFUND,Current,2023-01-11 09:00:00,2023-01-10 09:00:00,Refund,5.00,0.00,CHF,COMPLETED,105.00\n"
+    )
+
+    assert balances(extract(tmp_path, text)) == {
+        "CHF": (datetime.date(2023, 1, 12), D("105.00"))
+    }
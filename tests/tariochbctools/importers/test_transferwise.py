@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+from beancount.ingest import cache
+
+rsa = pytest.importorskip("rsa")
+
+from tariochbctools.importers.transferwise import importer as twimp  # noqa: E402
+
+# pylint: disable=protected-access
+
+
+TRANSACTIONS = [
+    ("2020-06-01T00:00:00+00:00", "1", "CARD", "card", 1.5),
+    # at the boundary of the first two intervals
+    ("2020-12-31T00:00:00+00:00", "2", "TRANSFER", "transfer", -10),
+    ("2020-12-31T00:00:00+00:00", "2", "FEE", "fee", -1.5),
+    ("2021-03-01T00:00:00+00:00", "3", "CARD", "card", 1.5),
+    ("2021-03-01T00:00:00+00:00", "3", "CARD", "card again", 1.5),
+]
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200, headers=None):
+        self.payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """Wise API answering statements only to signed requests."""
+
+    def __init__(self, public_key):
+        self.public_key = public_key
+        self.challenges = 0
+        self.statements = []
+        self.lock = threading.Lock()
+
+    def get(self, url, headers, params=None):
+        if url.endswith("/v1/borderless-accounts"):
+            return FakeResponse(
+                [{"id": 2, "balances": [{"currency": "CHF"}, {"currency": "EUR"}]}]
+            )
+
+        if "X-Signature" not in headers:
+            with self.lock:
+                self.challenges += 1
+            return FakeResponse({}, 403, {"x-2fa-approval": "one-time-token"})
+        rsa.verify(
+            b"one-time-token",
+            twimp.base64.b64decode(headers["X-Signature"]),
+            self.public_key,
+        )
+
+        with self.lock:
+            self.statements.append(params)
+        ccy = params["currency"]
+        return FakeResponse(
+            {
+                "transactions": [
+                    {
+                        "referenceNumber": f"{ccy}-{reference}",
+                        "date": date,
+                        "details": {"type": type, "description": f"{ccy}-{name}"},
+                        "amount": {"value": value, "currency": ccy},
+                    }
+                    for date, reference, type, name, value in TRANSACTIONS
+                    if params["intervalStart"] <= date <= params["intervalEnd"]
+                ]
+            }
+        )
+
+
+@pytest.fixture(name="tmp_config")
+def tmp_config_fixture(tmp_path):
+    public_key, private_key = rsa.newkeys(512)
+    key = tmp_path / "wise.pem"
+    key.write_bytes(private_key.save_pkcs1())
+    config = tmp_path / "transferwise.yaml"
+    config.write_text(
+        f"token: token\nbaseAccount: 'Assets:Wise:'\nprivateKeyPath: {key}\n"
+    )
+    yield cache.get_file(config), public_key
+
+
+def test_split_interval():
+    intervals = twimp.split_interval(
+        "2020-01-01T00:00:00+00:00", "2022-06-01T00:00:00+00:00"
+    )
+    assert intervals == [
+        ("2020-01-01T00:00:00+00:00", "2020-12-31T00:00:00+00:00"),
+        ("2020-12-31T00:00:00+00:00", "2021-12-31T00:00:00+00:00"),
+        ("2021-12-31T00:00:00+00:00", "2022-06-01T00:00:00+00:00"),
+    ]
+
+
+def test_extract_fetches_intervals_of_all_currencies(tmp_config):
+    config, public_key = tmp_config
+    importer = twimp.Importer(
+        profileId=1,
+        startDate="2020-01-01T00:00:00+00:00",
+        endDate="2022-06-01T00:00:00+00:00",
+    )
+    importer.session = FakeSession(public_key)
+    signatures = []
+    sign = importer._do_sca_challenge
+    importer._do_sca_challenge = lambda: signatures.append(sign()) or signatures[-1]
+
+    entries = importer.extract(config, [])
+
+    assert [e.narration for e in entries] == [
+        f"{ccy}-{name}"
+        for ccy in ("CHF", "EUR")
+        for name in ("card", "transfer", "fee", "card", "card again")
+    ]
+    assert entries[5].postings[0].account == "Assets:Wise:EUR"
+    assert len(importer.session.statements) == 6
+    # the concurrent requests are challenged together
+    assert len(signatures) == 1
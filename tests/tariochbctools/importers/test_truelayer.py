@@ -5,6 +5,7 @@ import yaml
 from beancount.core.amount import Decimal as D
 from beancount.ingest import cache
 
+from tariochbctools.importers.general.stateStore import JsonStateStore
 from tariochbctools.importers.truelayer import importer as tlimp
 
 # pylint: disable=protected-access
@@ -109,69 +110,64 @@ def test_identify(importer, tmp_config):
 
 
 def test_extract_transaction_simple(importer, tmp_trx):
-    entries = importer._extract_transaction(
-        tmp_trx, "Assets:Other", [tmp_trx], invert_sign=False
-    )
+    entries = importer._extract_transaction(tmp_trx, "Assets:Other", invert_sign=False)
     assert entries[0].postings[0].units.number == D(str(tmp_trx["amount"]))
 
 
-def test_extract_transaction_with_balance(importer, tmp_trx):
-    entries = importer._extract_transaction(
-        tmp_trx, "Assets:Other", [tmp_trx], invert_sign=False
-    )
-    # one entry, one balance
-    assert len(entries) == 2
-    assert entries[1].amount.number == D(str(tmp_trx["running_balance"]["amount"]))
+def test_extract_balance(importer, tmp_trx):
+    entries = importer._extract_balance(tmp_trx, "Assets:Other", invert_sign=False)
+    assert len(entries) == 1
+    assert entries[0].amount.number == D(str(tmp_trx["running_balance"]["amount"]))
+    assert not entries[0].meta.get("__duplicate__")
+
+
+def test_extract_balance_marks_duplicate(importer, tmp_config, tmp_trx):
+    existing = importer._extract_balance(tmp_trx, "Assets:Other", invert_sign=False)
+    importer._configure(tmp_config, existing)
+
+    entries = importer._extract_balance(tmp_trx, "Assets:Other", invert_sign=False)
+    assert entries[0].meta["__duplicate__"]
+
+    entries = importer._extract_balance(tmp_trx, "Assets:Savings", invert_sign=False)
+    assert not entries[0].meta.get("__duplicate__")
 
 
 def test_extract_transaction_invert_sign(importer, tmp_trx):
     """Show that sign inversion works"""
-    entries = importer._extract_transaction(
-        tmp_trx, "Assets:Other", [tmp_trx], invert_sign=True
-    )
+    entries = importer._extract_transaction(tmp_trx, "Assets:Other", invert_sign=True)
     assert entries[0].postings[0].units.number == -D(str(tmp_trx["amount"]))
 
 
 @pytest.mark.parametrize("id_field", tlimp.TX_MANDATORY_ID_FIELDS)
 def test_extract_transaction_has_transaction_id(importer, tmp_trx, id_field):
     """Ensure mandatory IDs are in extracted transactions."""
-    entries = importer._extract_transaction(
-        tmp_trx, "Assets:Other", [tmp_trx], invert_sign=False
-    )
+    entries = importer._extract_transaction(tmp_trx, "Assets:Other", invert_sign=False)
     assert entries[0].meta[id_field] == tmp_trx[id_field]
 
 
 @pytest.mark.parametrize("id_field", tlimp.TX_OPTIONAL_ID_FIELDS)
 def test_trx_id(importer, tmp_trx, id_field):
-    entries = importer._extract_transaction(
-        tmp_trx, "Assets:Other", [tmp_trx], invert_sign=False
-    )
+    entries = importer._extract_transaction(tmp_trx, "Assets:Other", invert_sign=False)
     assert entries[0].meta[id_field] == tmp_trx[id_field]
 
 
 @pytest.mark.parametrize("id_field", tlimp.TX_OPTIONAL_ID_FIELDS)
 def test_trx_id_is_optional(importer, id_field):
     tmp_trx = json.loads(TEST_TRX_WITHOUT_IDS)
-    entries = importer._extract_transaction(
-        tmp_trx, "Assets:Other", [tmp_trx], invert_sign=False
-    )
+    entries = importer._extract_transaction(tmp_trx, "Assets:Other", invert_sign=False)
     assert entries[0].meta.get(id_field) is None
 
 
 @pytest.mark.parametrize("id_field", tlimp.TX_OPTIONAL_META_ID_FIELDS)
 def test_trx_meta_id(importer, tmp_trx, id_field):
-    entries = importer._extract_transaction(
-        tmp_trx, "Assets:Other", [tmp_trx], invert_sign=False
-    )
+    entries = importer._extract_transaction(tmp_trx, "Assets:Other", invert_sign=False)
     assert entries[0].meta[id_field] == tmp_trx["meta"][id_field]
 
 
 @pytest.mark.parametrize("id_field", tlimp.TX_OPTIONAL_META_ID_FIELDS)
 def test_trx_meta_id_is_optional(importer, id_field):
     tmp_trx = json.loads(TEST_TRX_WITHOUT_IDS)
-    entries = importer._extract_transaction(
-        tmp_trx, "Assets:Other", [tmp_trx], invert_sign=False
-    )
+    entries = importer._extract_transaction(tmp_trx, "Assets:Other", invert_sign=False)
     assert entries[0].meta.get(id_field) is None
 
 
@@ -198,3 +194,117 @@ def test_accounts_config_is_optional(importer_factory):
 
     importer = importer_factory(TEST_CONFIG_WITHOUT_ACCOUNTS)
     assert importer._get_account_for_account_id("any-account-id-1") == "DefaultAccount"
+
+
+def test_extract_transaction_marks_duplicate(importer, tmp_config, tmp_trx):
+    existing = importer._extract_transaction(tmp_trx, "Assets:Other", invert_sign=False)
+    importer._configure(tmp_config, existing)
+
+    entries = importer._extract_transaction(tmp_trx, "Assets:Other", invert_sign=False)
+    assert entries[0].meta["__duplicate__"]
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __bool__(self):
+        return True
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    def __init__(self, trx):
+        self.trx = trx
+        self.params = {}
+
+    def post(self, url, data):
+        return FakeResponse({"access_token": "token"})
+
+    def get(self, url, headers, params=None):
+        parts = url.split("/data/v1/")[1].split("/")
+        self.params["/".join(parts[:2])] = params
+        if len(parts) == 1:
+            ids = (1, 2) if parts[0] == "accounts" else (3, 4)
+            return FakeResponse(
+                {"results": [{"account_id": f"hex-account-id-{i}"} for i in ids]}
+            )
+        trx = dict(self.trx, description=parts[0] + " " + parts[1])
+        return FakeResponse({"results": [trx]})
+
+
+def test_extract_keeps_account_order(importer, tmp_config, tmp_trx, tmp_path):
+    importer.session = FakeSession(tmp_trx)
+    importer.state = JsonStateStore("truelayer", tmp_path / "state.json")
+
+    entries = importer.extract(tmp_config, [])
+
+    assert [e.narration for e in entries if hasattr(e, "narration")] == [
+        "accounts hex-account-id-1",
+        "accounts hex-account-id-2",
+        "cards hex-account-id-3",
+        "cards hex-account-id-4",
+    ]
+    assert entries[-1].amount.number == -D(str(tmp_trx["running_balance"]["amount"]))
+
+
+def test_extract_requests_transactions_since_last_import(
+    importer, tmp_config, tmp_trx, tmp_path
+):
+    importer.session = FakeSession(tmp_trx)
+    importer.state = JsonStateStore("truelayer", tmp_path / "state.json")
+
+    existing = importer._extract_transaction(tmp_trx, "Assets:Other", False)
+    entries = importer.extract(tmp_config, existing)
+
+    # only hex-account-id-1 has been imported before
+    params = importer.session.params["accounts/hex-account-id-1"]
+    assert params["from"] == "2021-06-07T00:00:00"
+    assert len(params["to"]) == len(params["from"])
+    assert importer.session.params["accounts/hex-account-id-2"] is None
+    assert entries[0].meta["__duplicate__"]
+
+
+def test_extract_fetches_shared_account_completely(importer_factory, tmp_trx, tmp_path):
+    importer = importer_factory(TEST_CONFIG.split(b"    accounts:")[0])
+    tmp_config = cache.get_file(tmp_path / "truelayer.yaml")
+    importer.session = FakeSession(tmp_trx)
+    importer.state = JsonStateStore("truelayer", tmp_path / "state.json")
+
+    existing = importer._extract_transaction(tmp_trx, "DefaultAccount", False)
+    importer.extract(tmp_config, existing)
+
+    # the ledger does not tell which of them the transaction came from
+    assert len(importer.session.params) == 6
+    assert not any(importer.session.params.values())
+
+
+def test_extract_without_ledger_uses_last_sync(importer_factory, tmp_trx, tmp_path):
+    importer = importer_factory(TEST_CONFIG + b"    incremental: true\n")
+    tmp_config = cache.get_file(tmp_path / "truelayer.yaml")
+    importer.session = FakeSession(tmp_trx)
+    importer.state = JsonStateStore("truelayer", tmp_path / "state.json")
+
+    importer.extract(tmp_config, [])
+    assert importer.state.get("hex-account-id-2") == "2021-06-14"
+
+    importer.session.params = {}
+    importer.extract(tmp_config, None)
+    params = [p for p in importer.session.params.values() if p]
+    assert len(params) == 4
+    assert all(p["from"] == "2021-06-07T00:00:00" for p in params)
+
+
+def test_extract_keeps_last_sync_unless_incremental(
+    importer, tmp_config, tmp_trx, tmp_path
+):
+    importer.session = FakeSession(tmp_trx)
+    importer.state = JsonStateStore("truelayer", tmp_path / "state.json")
+    importer.state.set("hex-account-id-2", "2021-06-01")
+
+    importer.extract(tmp_config, None)
+
+    assert importer.state.get("hex-account-id-2") == "2021-06-01"
+    assert not any(importer.session.params.values())